@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
@@ -16,6 +17,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search.is_available() or not search.to_match(search_term):
+            return super().get_search_results(
+                request, queryset, search_term)
+        return (
+            queryset.filter(pk__in=search.matching_ids(search_term)),
+            False,
+        )
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,199 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from . import cache_tags, page_cache
+from .models import Group, Post, TimelineEntry
+from .paginators import BatchPaginator
+from .storage import ContentAddressedStorage
+from .utils import PER_PAGE
+
+User = get_user_model()
+
+# Поле API → путь в модели Post
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'text_html': 'text_html',
+    'excerpt': 'excerpt',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'image_width': 'image_width',
+    'image_height': 'image_height',
+    'comments_count': 'comments_count',
+}
+DEFAULT_FIELDS = (
+    'id', 'excerpt', 'pub_date', 'author', 'group', 'image', 'image_width',
+    'image_height', 'comments_count',
+)
+# Служебные поля: ключи курсора и теги posts.cache_tags
+SERVICE_FIELDS = ('pub_date', 'id', 'author_id', 'group_id')
+
+_storage = ContentAddressedStorage()
+CONVERTERS = {
+    'pub_date': lambda value: value.isoformat(),
+    'image': lambda value: _storage.url(value) if value else None,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class RowPaginator(BatchPaginator):
+    """BatchPaginator для строк values_list, где ключи идут первыми."""
+
+    def key_values(self, row):
+        return row[:len(self.keys)]
+
+
+def dumps(data):
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def serialize(fields, rows, next_cursor):
+    """JSON-байты страницы прямо из строк values_list без моделей.
+
+    Первые len(SERVICE_FIELDS) значений строки служебные, за ними
+    идут поля fields в том же порядке.
+    """
+    skip = len(SERVICE_FIELDS)
+    converters = [CONVERTERS.get(field) for field in fields]
+    results = []
+    for row in rows:
+        item = {}
+        for field, convert, value in zip(fields, converters, row[skip:]):
+            item[field] = (
+                convert(value) if convert and value is not None else value)
+        results.append(item)
+    return dumps({'results': results, 'next_cursor': next_cursor})
+
+
+def _fields(request):
+    value = request.GET.get('fields')
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(
+        field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown or not fields:
+        raise ApiError(400, f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', PER_PAGE))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом')
+    return min(max(limit, 1), settings.API_MAX_LIMIT)
+
+
+def _page(request, queryset, scope_tag, prefix='', keys=('pub_date', 'id')):
+    fields = _fields(request)
+    paths = [prefix + FIELDS[field] for field in fields]
+    service = [prefix + field for field in SERVICE_FIELDS]
+    if prefix:
+        # В ленте подписок курсор идёт по ключу TimelineEntry
+        service[:2] = keys
+    rows = queryset.values_list(*service, *paths)
+    paginator = RowPaginator(rows, _limit(request), keys=keys)
+    rows, next_cursor = paginator.get_batch(request.GET.get('cursor'))
+    tags = [scope_tag]
+    for row in rows:
+        post_id, author_id, group_id = row[1:4]
+        tags.append(cache_tags.make_tag(cache_tags.POST, post_id))
+        tags.append(cache_tags.make_tag(cache_tags.AUTHOR, author_id))
+        if group_id is not None:
+            tags.append(cache_tags.make_tag(cache_tags.GROUP, group_id))
+    page_cache.depend(request, tags)
+    return serialize(fields, rows, next_cursor)
+
+
+def _response(request, status, body, private=False):
+    response = HttpResponse(
+        body, status=status, content_type='application/json')
+    if status != 200:
+        return response
+    response['ETag'] = f'"{hashlib.md5(body).hexdigest()}"'
+    if private:
+        patch_cache_control(response, private=True, max_age=0)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+    return get_conditional_response(
+        request, etag=response['ETag'], response=response)
+
+
+def api_view(private=False):
+    """Только GET и HEAD, ошибки ApiError — в JSON {"detail": ...}."""
+
+    def decorator(view):
+        @require_safe
+        def wrapper(request, *args, **kwargs):
+            try:
+                body = view(request, *args, **kwargs)
+            except ApiError as error:
+                return _response(
+                    request, error.status, dumps({'detail': error.detail}))
+            return _response(request, 200, body, private=private)
+
+        return wrapper
+
+    return decorator
+
+
+@api_view()
+def posts(request):
+    return _page(
+        request, Post.objects.all(), cache_tags.make_tag(cache_tags.FEED))
+
+
+@api_view()
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        raise ApiError(404, 'Группа не найдена')
+    return _page(
+        request,
+        Post.objects.filter(group_id=group_id),
+        cache_tags.make_tag(cache_tags.GROUP, group_id),
+    )
+
+
+@api_view()
+def profile_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        raise ApiError(404, 'Пользователь не найден')
+    return _page(
+        request,
+        Post.objects.filter(author_id=author_id),
+        cache_tags.make_tag(cache_tags.AUTHOR, author_id),
+    )
+
+
+@api_view(private=True)
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация')
+    return _page(
+        request,
+        TimelineEntry.objects.filter(user=request.user),
+        cache_tags.make_tag(cache_tags.FOLLOWER, request.user.pk),
+        prefix='post__',
+        keys=('pub_date', 'post_id'),
+    )
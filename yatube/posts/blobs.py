@@ -0,0 +1,150 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from . import thumbnails
+from .models import ImageBlob, Post
+from .storage import content_hash, content_name, is_content_name
+
+logger = logging.getLogger(__name__)
+
+
+def _storage():
+    return Post._meta.get_field('image').storage
+
+
+def acquire(name):
+    """Добавляет ссылку поста на файл картинки."""
+    if not is_content_name(name):
+        return
+    updated = ImageBlob.objects.filter(name=name).update(
+        refcount=F('refcount') + 1)
+    if not updated:
+        blob, created = ImageBlob.objects.get_or_create(
+            name=name, defaults={'refcount': 1})
+        if not created:
+            ImageBlob.objects.filter(name=name).update(
+                refcount=F('refcount') + 1)
+
+
+def release(name):
+    """Убирает ссылку на файл; последний освободивший удаляет файл
+    и его миниатюры после коммита."""
+    if not is_content_name(name):
+        return
+    ImageBlob.objects.filter(name=name, refcount__gt=0).update(
+        refcount=F('refcount') - 1)
+    transaction.on_commit(lambda: _collect(name))
+
+
+def _collect(name):
+    """Удаляет файл без ссылок. Строка удаляется условием на нулевой
+    счётчик, и файл удаляется в той же транзакции: ссылка, которую
+    ContentAddressedStorage.save берёт до проверки файла, либо
+    отменяет удаление, либо увидит, что файла уже нет."""
+    with transaction.atomic():
+        deleted, _ = ImageBlob.objects.filter(
+            name=name, refcount=0).delete()
+        if deleted:
+            delete_file(name)
+
+
+def delete_file(name):
+    """Удаляет файл, его записи в KV-хранилище sorl и все варианты."""
+    source = ImageFile(name, _storage())
+    try:
+        for geometry, options in thumbnails.variants():
+            _, thumbnail, _ = default.backend.get_thumbnail_file(
+                source, geometry, **options)
+            thumbnail.delete()
+        default.kvstore.delete(source)
+        source.delete()
+    except OSError:
+        logger.exception('Не удалось удалить картинку %s', name)
+
+
+def rebuild():
+    """Пересчитывает ссылки по постам; возвращает число файлов."""
+    counts = (
+        Post.objects
+        .exclude(image='')
+        .order_by()
+        .values('image')
+        .annotate(refcount=Count('pk'))
+    )
+    blobs = [
+        ImageBlob(name=row['image'], refcount=row['refcount'])
+        for row in counts
+        if is_content_name(row['image'])
+    ]
+    with transaction.atomic():
+        ImageBlob.objects.all().delete()
+        ImageBlob.objects.bulk_create(blobs)
+    return len(blobs)
+
+
+def _post_chunks(chunk_size):
+    last_pk = 0
+    while True:
+        posts = list(
+            Post.objects
+            .filter(pk__gt=last_pk)
+            .exclude(image='')
+            .order_by('pk')
+            .only('pk', 'image', 'image_hash')[:chunk_size]
+        )
+        if not posts:
+            return
+        last_pk = posts[-1].pk
+        yield posts
+
+
+def _rewrite(storage, post, new_names, dry_run):
+    """Записывает картинку поста под именем из хеша, если такого
+    файла ещё нет. Возвращает (новое имя, хеш, байт записано)."""
+    name = post.image.name
+    written = 0
+    with storage.open(name) as content:
+        content.sha256 = post.image_hash or content_hash(content)
+        new_name = content_name(content.sha256, name)
+        if new_name not in new_names and not storage.exists(new_name):
+            written = content.size
+            if not dry_run:
+                storage.save(new_name, content)
+    return new_name, content.sha256, written
+
+
+def dedupe(chunk_size, dry_run=False):
+    """Переносит картинки со старыми именами в хранилище по хешу.
+
+    Одинаковые файлы сливаются в один, старые файлы и их миниатюры
+    удаляются. Возвращает (число постов, байт записано, байт удалено).
+    """
+    storage = _storage()
+    moved = written = removed = 0
+    old_names = set()
+    new_names = set()
+    for posts in _post_chunks(chunk_size):
+        for post in posts:
+            name = post.image.name
+            if is_content_name(name) or not storage.exists(name):
+                continue
+            new_name, digest, size = _rewrite(
+                storage, post, new_names, dry_run)
+            written += size
+            new_names.add(new_name)
+            if name not in old_names:
+                old_names.add(name)
+                removed += storage.size(name)
+            if not dry_run:
+                Post.objects.filter(pk=post.pk).update(
+                    image=new_name, image_hash=digest)
+            moved += 1
+    if not dry_run:
+        for name in old_names:
+            delete_file(name)
+        rebuild()
+    return moved, written, removed
@@ -0,0 +1,65 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+FEED = 'feed'
+GROUP = 'group'
+AUTHOR = 'author'
+POST = 'post'
+FOLLOWER = 'follower'
+
+
+def make_tag(kind, pk=None):
+    return kind if pk is None else f'{kind}:{pk}'
+
+
+def _key(tag):
+    return f'posts:tag:{tag}'
+
+
+def _new_version():
+    # Версия — время в наносекундах, а не счётчик с единицы: если ключ
+    # вытеснят из кеша, новое поколение не совпадёт ни с одним старым
+    # фрагментом, а по версиям можно отдавать Last-Modified.
+    return time.time_ns()
+
+
+def get_versions(tags):
+    """Возвращает текущие поколения тегов одним запросом к кешу."""
+    keys = {_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    versions = {keys[key]: value for key, value in found.items()}
+    for key, tag in keys.items():
+        if key not in found:
+            cache.add(key, _new_version(), timeout=None)
+            versions[tag] = cache.get(key)
+    return versions
+
+
+def bump(tags):
+    """Сменяет поколения тегов, чем сбрасывает все зависящие фрагменты.
+
+    Новая версия всегда больше старой, даже если часы отстают.
+    """
+    keys = [_key(tag) for tag in tags]
+    current = cache.get_many(keys)
+    version = max([_new_version(), *(value + 1 for value in current.values())])
+    cache.set_many({key: version for key in keys}, timeout=None)
+
+
+def last_modified(versions):
+    """Время последней смены поколения среди версий тегов."""
+    return datetime.fromtimestamp(
+        max(versions.values()) / 10 ** 9, tz=timezone.utc)
+
+
+def post_tags(post):
+    """Теги, от которых зависит карточка поста в ленте."""
+    tags = [
+        make_tag(POST, post.pk),
+        make_tag(AUTHOR, post.author_id),
+    ]
+    if post.group_id is not None:
+        tags.append(make_tag(GROUP, post.group_id))
+    return tags
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Group, Post, TimelineEntry
+
+ALL = 'all'
+GROUP = 'group'
+FOLLOWER = 'follower'
+
+
+def make_key(scope, pk=None):
+    return f'posts:count:{scope}:{pk}'
+
+
+def _count(queryset):
+    return queryset[:settings.FEED_COUNT_LIMIT].count()
+
+
+def _timeout(value):
+    if value >= settings.FEED_COUNT_LIMIT:
+        return settings.FEED_COUNT_ESTIMATE_TIMEOUT
+    return settings.FEED_COUNT_TIMEOUT
+
+
+def get_count(scope, pk, queryset):
+    """Возвращает число постов в ленте из хранилища счётчиков.
+
+    Если счётчика нет или он устарел, считает не дальше
+    FEED_COUNT_LIMIT строк. Такое значение точно для небольших лент
+    и живёт FEED_COUNT_TIMEOUT: сигналы двигают счётчик только в кеше
+    своего процесса, а update() и bulk_create() его не двигают вовсе.
+    Для больших лент значение — оценка снизу на
+    FEED_COUNT_ESTIMATE_TIMEOUT.
+    """
+    key = make_key(scope, pk)
+    value = cache.get(key)
+    if value is None:
+        value = _count(queryset)
+        cache.add(key, value, timeout=_timeout(value))
+    return value
+
+
+def post_keys(group_id):
+    # Посты автора считает ProfileStats.posts_count, здесь их не дублируем
+    keys = [make_key(ALL)]
+    if group_id is not None:
+        keys.append(make_key(GROUP, group_id))
+    return keys
+
+
+def follower_keys(user_ids):
+    return [make_key(FOLLOWER, user_id) for user_id in user_ids]
+
+
+def change(keys, delta):
+    """Сдвигает существующие счётчики; отсутствующие посчитаются заново."""
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def invalidate(keys):
+    cache.delete_many(keys)
+
+
+def _querysets():
+    querysets = {make_key(ALL): Post.objects.all()}
+    for group_id in Group.objects.values_list('pk', flat=True):
+        querysets[make_key(GROUP, group_id)] = Post.objects.filter(
+            group_id=group_id)
+    entries = TimelineEntry.objects.all()
+    user_ids = entries.values_list('user_id', flat=True).distinct().order_by()
+    for user_id in user_ids:
+        querysets[make_key(FOLLOWER, user_id)] = entries.filter(
+            user_id=user_id)
+    return querysets
+
+
+def reconcile():
+    """Пересчитывает счётчики лент, которые есть в кеше, и исправляет
+    расхождения.
+
+    Возвращает число исправленных счётчиков. Кеш в памяти процесса
+    так сверяется только в том процессе, где вызвана функция.
+    """
+    querysets = _querysets()
+    fixed = 0
+    for key, value in cache.get_many(querysets).items():
+        actual = _count(querysets[key])
+        if actual != value:
+            cache.set(key, actual, timeout=_timeout(actual))
+            fixed += 1
+    return fixed
@@ -1,5 +1,8 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
 
+from . import uploads
 from .models import Comment, Post
 
 
@@ -17,6 +20,28 @@ class PostForm(forms.ModelForm):
             'group': 'Группа, к которой будет относиться пост'
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Обрезанный ImageUploadHandler файл не отдаётся Pillow:
+        # он убирается из данных, а ошибку выдаёт clean_image.
+        self.image_too_large = getattr(
+            self.files.get('image'), 'too_large', False)
+        if self.image_too_large:
+            self.files = self.files.copy()
+            self.files.pop('image')
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if self.image_too_large:
+            raise forms.ValidationError(
+                'Файл больше %(limit)s МБ.',
+                code='too_large',
+                params={'limit': settings.POST_IMAGE_MAX_BYTES // 2 ** 20},
+            )
+        if isinstance(image, UploadedFile):
+            return uploads.prepare_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
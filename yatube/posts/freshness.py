@@ -0,0 +1,122 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+from django.views.decorators.http import condition
+
+from . import cache_tags, counters
+from .models import Follow, Group, Post
+from .utils import get_comments, get_page_obj
+
+User = get_user_model()
+
+# Поля, нужные для тегов карточек и курсора страницы
+PAGE_FIELDS = ('pk', 'author_id', 'group_id', 'pub_date')
+# Поля комментария для тегов его автора и курсора порции
+COMMENT_FIELDS = ('pk', 'author', 'created')
+
+
+def conditional(compute):
+    """Как condition(), но ETag и Last-Modified считаются одним
+    вызовом compute(request, *args, **kwargs) → (etag, last_modified).
+
+    Валидаторы строятся из поколений тегов posts.cache_tags, которые
+    сигналы меняют при любой правке поста, комментария, подписки,
+    группы или автора, и из маленьких запросов по индексам.
+    """
+
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_freshness'):
+            request._freshness = compute(request, *args, **kwargs)
+        return request._freshness
+
+    return condition(
+        etag_func=lambda *args, **kwargs: validators(*args, **kwargs)[0],
+        last_modified_func=(
+            lambda *args, **kwargs: validators(*args, **kwargs)[1]),
+    )
+
+
+def _validators(request, name, tags, *extra):
+    versions = cache_tags.get_versions(tags)
+    # Те же входные данные, что у ETag в posts.page_cache: формы
+    # страницы несут CSRF-токен, и после его смены копия устарела.
+    parts = [
+        name, request.get_full_path(), request.user.pk,
+        request.META.get('CSRF_COOKIE'), *extra,
+        *(versions[tag] for tag in tags),
+    ]
+    etag = hashlib.md5(repr(parts).encode()).hexdigest()
+    # Шапка и формы зависят от пользователя, а смену пользователя
+    # Last-Modified не отражает; ETag содержит его id.
+    if request.user.is_authenticated:
+        return etag, None
+    return etag, cache_tags.last_modified(versions)
+
+
+def _page_tags(request, queryset, scope=None, **kwargs):
+    page = get_page_obj(
+        request, queryset.only(*PAGE_FIELDS), scope, **kwargs)
+    tags = []
+    for post in page:
+        tags.extend(cache_tags.post_tags(post))
+    return tags
+
+
+def post_detail(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id').first()
+    if post is None:
+        return None, None
+    author_id, group_id = post
+    tags = [
+        cache_tags.make_tag(cache_tags.POST, post_id),
+        cache_tags.make_tag(cache_tags.AUTHOR, author_id),
+    ]
+    if group_id is not None:
+        tags.append(cache_tags.make_tag(cache_tags.GROUP, group_id))
+    # Имена авторов комментариев на странице, как в depend() вида
+    comments, _ = get_comments(
+        post_id, request.GET.get('comments'), fields=COMMENT_FIELDS)
+    tags.extend(
+        cache_tags.make_tag(cache_tags.AUTHOR, comment.author_id)
+        for comment in comments
+    )
+    return _validators(request, 'post_detail', list(dict.fromkeys(tags)))
+
+
+def profile(request, username):
+    fields = [
+        'pk', 'stats__posts_count', 'stats__followers_count',
+        'stats__following_count',
+    ]
+    authors = User.objects.filter(username=username)
+    if request.user.is_authenticated:
+        authors = authors.annotate(is_following=Exists(Follow.objects.filter(
+            user=request.user, author=OuterRef('pk'))))
+        fields.append('is_following')
+    author = authors.values_list(*fields).first()
+    if author is None:
+        return None, None
+    author_id, posts_count = author[:2]
+    tags = [cache_tags.make_tag(cache_tags.AUTHOR, author_id)]
+    tags.extend(_page_tags(
+        request,
+        Post.objects.filter(author_id=author_id),
+        count=posts_count or 0,
+    ))
+    return _validators(request, 'profile', list(dict.fromkeys(tags)), author)
+
+
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return None, None
+    tags = [cache_tags.make_tag(cache_tags.GROUP, group_id)]
+    tags.extend(_page_tags(
+        request,
+        Post.objects.filter(group_id=group_id),
+        (counters.GROUP, group_id),
+    ))
+    return _validators(request, 'group_posts', list(dict.fromkeys(tags)))
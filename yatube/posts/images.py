@@ -0,0 +1,93 @@
+import hashlib
+import logging
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+EMPTY_METADATA = {
+    'image_width': None,
+    'image_height': None,
+    'image_format': '',
+    'image_size': None,
+    'image_hash': '',
+}
+METADATA_FIELDS = tuple(EMPTY_METADATA)
+
+
+def read_metadata(file_):
+    """Размеры, формат, размер в байтах и SHA-256 файла картинки.
+
+    Файл должен быть открыт; он читается по частям, а Pillow
+    разбирает только заголовок. Хеш, посчитанный при загрузке
+    в ImageUploadHandler, повторно не считается.
+    """
+    image_hash = getattr(file_, 'sha256', None)
+    if image_hash:
+        size = file_.size
+    else:
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in file_.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+        file_.seek(0)
+        image_hash = digest.hexdigest()
+    with Image.open(file_) as image:
+        width, height = image.size
+        image_format = image.format or ''
+    file_.seek(0)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_format': image_format,
+        'image_size': size,
+        'image_hash': image_hash,
+    }
+
+
+def fill_metadata(post):
+    """Записывает в пост сведения о только что загруженной картинке."""
+    if not post.image:
+        metadata = EMPTY_METADATA
+    elif not post.image._committed:
+        metadata = read_metadata(post.image.file)
+    else:
+        return
+    for field, value in metadata.items():
+        setattr(post, field, value)
+
+
+def backfill(chunk_size):
+    """Заполняет сведения о картинках у старых постов порциями по pk.
+
+    Возвращает число обновлённых постов; недоступные файлы пропускаются.
+    """
+    from .models import Post
+
+    updated = 0
+    last_pk = 0
+    while True:
+        posts = list(
+            Post.objects
+            .filter(pk__gt=last_pk, image_hash='')
+            .exclude(image='')
+            .order_by('pk')
+            .only('pk', 'image', *METADATA_FIELDS)[:chunk_size]
+        )
+        if not posts:
+            return updated
+        last_pk = posts[-1].pk
+        changed = []
+        for post in posts:
+            try:
+                with post.image.open('rb'):
+                    metadata = read_metadata(post.image)
+            except (OSError, ValueError):
+                logger.warning('Не удалось прочитать картинку %s', post.image)
+                continue
+            for field, value in metadata.items():
+                setattr(post, field, value)
+            changed.append(post)
+        Post.objects.bulk_update(changed, METADATA_FIELDS)
+        updated += len(changed)
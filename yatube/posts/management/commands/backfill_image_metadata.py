@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import images
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет размеры, формат, размер файла и хеш картинок '
+        'у постов, загруженных до появления этих полей'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        updated = images.backfill(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Обновлено постов: {updated}'))
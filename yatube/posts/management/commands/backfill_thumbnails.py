@@ -0,0 +1,59 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт недостающие варианты картинок постов пулом процессов '
+        'и записывает их в KV-хранилище sorl; прерванный запуск '
+        'продолжается с места остановки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 — всё в текущем процессе',
+        )
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='Не больше картинок в секунду; 0 — без ограничения',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только оценить объём по выборке картинок',
+        )
+        parser.add_argument('--sample', type=int, default=50)
+        parser.add_argument(
+            '--state',
+            default=os.path.join(
+                settings.MEDIA_ROOT, '.thumbnail_backfill.json'),
+            help='Файл с прогрессом для продолжения',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не глядя на сохранённый прогресс',
+        )
+
+    def handle(self, *args, **options):
+        if options['restart'] and os.path.exists(options['state']):
+            os.remove(options['state'])
+        totals = thumbnails.backfill(
+            options['workers'],
+            options['chunk_size'],
+            rate=options['rate'],
+            dry_run=options['dry_run'],
+            sample=options['sample'],
+            state_path=options['state'],
+        )
+        size = totals['bytes'] / 2 ** 20
+        label = 'оценка объёма' if options['dry_run'] else 'записано'
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок: {totals["images"]}, миниатюр: '
+            f'{totals["thumbnails"]}, {label} {size:.1f} МБ, '
+            f'ошибок: {totals["errors"]}'
+        ))
@@ -0,0 +1,122 @@
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Group, Post
+from posts.read_models import post_rows
+from posts.utils import PER_PAGE
+
+User = get_user_model()
+PREFIX = 'benchmark_feed_'
+
+
+def touch(post):
+    """Обращается к полям так же, как шаблоны лент."""
+    return (
+        post.pk, post.pub_date, post.excerpt, post.comments_count,
+        post.image.name, post.author.get_full_name(), post.author.username,
+        post.group and post.group.slug,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает память и время страницы ленты на моделях Post и на '
+        'строках posts.read_models; данные создаются в транзакции, '
+        'которая затем откатывается'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--authors', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--pages', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        variants = [
+            ('Post', lambda: Post.objects.defer('text')),
+            ('Post + select_related', lambda: (
+                Post.objects.select_related('author', 'group')
+                .defer('text'))),
+            ('PostRow', lambda: post_rows(Post.objects.all())),
+        ]
+        with transaction.atomic():
+            total = self.fill(rng, options)
+            offsets = [
+                rng.randrange(0, max(total - PER_PAGE, 1))
+                for _ in range(options['pages'])
+            ]
+            results = [
+                (name, self.measure(queryset, offsets))
+                for name, queryset in variants
+            ]
+            transaction.set_rollback(True)
+        for name, (timings, retained, peak) in results:
+            self.stdout.write(
+                f'{name}: медиана {statistics.median(timings):.2f} мс, '
+                f'максимум {max(timings):.2f} мс, '
+                f'память страницы {retained / 1024:.1f} КБ, '
+                f'пик {peak / 1024:.1f} КБ'
+            )
+
+    def fill(self, rng, options):
+        started = time.perf_counter()
+        User.objects.bulk_create([
+            User(username=f'{PREFIX}{i}', first_name='Имя', last_name=str(i))
+            for i in range(options['authors'])
+        ])
+        Group.objects.bulk_create([
+            Group(title=f'{PREFIX}{i}', slug=f'{PREFIX}{i}', description='')
+            for i in range(options['groups'])
+        ])
+        author_ids = list(User.objects.filter(
+            username__startswith=PREFIX).values_list('id', flat=True))
+        group_ids = list(Group.objects.filter(
+            slug__startswith=PREFIX).values_list('id', flat=True))
+        Post.objects.bulk_create(
+            [
+                Post(
+                    author_id=rng.choice(author_ids),
+                    group_id=rng.choice(group_ids + [None]),
+                    text='текст ' * 200,
+                    excerpt='текст ' * 50,
+                )
+                for _ in range(options['posts'])
+            ],
+            batch_size=500,
+        )
+        self.stdout.write(
+            f'Постов: {options["posts"]}, подготовка '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+        return Post.objects.count()
+
+    def measure(self, queryset, offsets):
+        timings = []
+        for offset in offsets:
+            started = time.perf_counter()
+            for post in queryset()[offset:offset + PER_PAGE]:
+                touch(post)
+            timings.append((time.perf_counter() - started) * 1000)
+        retained = []
+        peaks = []
+        tracemalloc.start()
+        for offset in offsets:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            page = list(queryset()[offset:offset + PER_PAGE])
+            for post in page:
+                touch(post)
+            current, peak = tracemalloc.get_traced_memory()
+            retained.append(current - before)
+            peaks.append(peak - before)
+            del page
+        tracemalloc.stop()
+        return timings, statistics.median(retained), statistics.median(peaks)
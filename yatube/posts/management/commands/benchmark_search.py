@@ -0,0 +1,90 @@
+import os
+import random
+import sqlite3
+import statistics
+import string
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.search import to_match
+
+VOCABULARY_SIZE = 20000
+WORDS_PER_POST = (10, 60)
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск LIKE и FTS5 на отдельной базе SQLite '
+        'со сгенерированными постами; рабочая база не затрагивается'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+            for _ in range(VOCABULARY_SIZE)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, 'bench.sqlite3'))
+            self.fill(db, rng, vocabulary, options['posts'])
+            terms = rng.sample(vocabulary, options['queries'])
+            like = self.measure(
+                db, terms, options['repeat'],
+                'SELECT id FROM posts_post WHERE text LIKE ? LIMIT 10',
+                lambda term: f'%{term}%',
+            )
+            fts = self.measure(
+                db, terms, options['repeat'],
+                'SELECT rowid FROM posts_post_fts WHERE posts_post_fts '
+                'MATCH ? ORDER BY bm25(posts_post_fts) LIMIT 10',
+                to_match,
+            )
+            db.close()
+        for name, timings in (('LIKE', like), ('FTS5', fts)):
+            self.stdout.write(
+                f'{name}: медиана {statistics.median(timings):.2f} мс, '
+                f'максимум {max(timings):.2f} мс'
+            )
+
+    def fill(self, db, rng, vocabulary, total):
+        db.executescript(
+            """
+            CREATE TABLE posts_post (id INTEGER PRIMARY KEY, text TEXT);
+            CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+                text, content='posts_post', content_rowid='id'
+            );
+            """
+        )
+        started = time.perf_counter()
+        for offset in range(0, total, BATCH_SIZE):
+            rows = [
+                (' '.join(rng.choices(
+                    vocabulary, k=rng.randint(*WORDS_PER_POST))),)
+                for _ in range(min(BATCH_SIZE, total - offset))
+            ]
+            db.executemany('INSERT INTO posts_post (text) VALUES (?)', rows)
+        db.execute(
+            "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')")
+        db.commit()
+        self.stdout.write(
+            f'Постов: {total}, подготовка '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+
+    def measure(self, db, terms, repeat, sql, prepare):
+        timings = []
+        for term in terms:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                db.execute(sql, (prepare(term),)).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+        return timings
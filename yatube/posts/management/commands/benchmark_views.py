@@ -0,0 +1,182 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import page_cache
+from posts.models import Comment, Follow, Group, Post, ProfileStats
+
+User = get_user_model()
+
+VIEWS = ('index', 'group_list', 'profile', 'post_detail', 'follow_index')
+# Адрес не из INTERNAL_IPS: иначе при DEBUG страницы идут мимо кеша
+# и в них встраивается панель отладки.
+REMOTE_ADDR = '10.0.0.1'
+
+
+def percentile(values, fraction):
+    """Процентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summary(values):
+    return {
+        'p50': percentile(values, 0.5),
+        'p90': percentile(values, 0.9),
+        'p99': percentile(values, 0.99),
+        'max': max(values),
+        'mean': statistics.mean(values),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет задержку, число SQL-запросов и размер ответа страниц '
+        'лент, профиля и поста на текущих данных и сохраняет результат '
+        'в JSON для сравнения прогонов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом')
+        parser.add_argument(
+            '--views', nargs='+', choices=VIEWS, default=list(VIEWS))
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output', help='Путь к JSON с результатами')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Нужен хотя бы один запрос')
+        targets = self.targets()
+        results = {}
+        for name in options['views']:
+            if name not in targets:
+                self.stderr.write(f'{name}: нет данных, пропущено')
+                continue
+            url, user = targets[name]
+            results[name] = self.measure(url, user, options)
+            self.report(name, results[name])
+        report = {
+            'label': options['label'],
+            'created': timezone.now().isoformat(),
+            'cold': options['cold'],
+            'requests': options['requests'],
+            'scale': self.scale(),
+            'views': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты сохранены в {options["output"]}'))
+
+    def targets(self):
+        """Самые тяжёлые страницы: самая большая группа, самый
+        плодовитый автор, самый обсуждаемый пост и самый активный
+        подписчик."""
+        targets = {'index': (reverse('posts:index'), None)}
+        group = (
+            Group.objects
+            .annotate(total=Count('posts'))
+            .order_by('-total')
+            .values_list('slug', flat=True)
+            .first()
+        )
+        if group:
+            targets['group_list'] = (
+                reverse('posts:group_list', args=[group]), None)
+        author = (
+            ProfileStats.objects
+            .order_by('-posts_count')
+            .values_list('user__username', flat=True)
+            .first()
+        )
+        if author:
+            targets['profile'] = (
+                reverse('posts:profile', args=[author]), None)
+        post_id = (
+            Post.objects
+            .order_by('-comments_count', '-pk')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if post_id:
+            targets['post_detail'] = (
+                reverse('posts:post_detail', args=[post_id]), None)
+        reader = (
+            ProfileStats.objects
+            .order_by('-following_count')
+            .values_list('user_id', flat=True)
+            .first()
+        )
+        if reader:
+            targets['follow_index'] = (
+                reverse('posts:follow_index'), User.objects.get(pk=reader))
+        return targets
+
+    def scale(self):
+        return {
+            'users': User.objects.count(),
+            'groups': Group.objects.count(),
+            'posts': Post.objects.count(),
+            'follows': Follow.objects.count(),
+            'comments': Comment.objects.count(),
+        }
+
+    def measure(self, url, user, options):
+        client = Client(REMOTE_ADDR=REMOTE_ADDR)
+        if user is not None:
+            client.force_login(user)
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings = []
+        queries = []
+        sizes = []
+        hits = 0
+        for _ in range(options['requests']):
+            if options['cold']:
+                cache.clear()
+                if user is not None:
+                    client.force_login(user)
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url} ответил {response.status_code}')
+            queries.append(len(context.captured_queries))
+            sizes.append(len(response.content))
+            hits += response.get(page_cache.HEADER) == 'HIT'
+        return {
+            'url': url,
+            'authenticated': user is not None,
+            'latency_ms': summary(timings),
+            'queries': summary(queries),
+            'bytes': summary(sizes),
+            'page_cache_hits': hits,
+        }
+
+    def report(self, name, result):
+        latency = result['latency_ms']
+        self.stdout.write(
+            f'{name}: p50 {latency["p50"]:.2f} мс, '
+            f'p90 {latency["p90"]:.2f} мс, p99 {latency["p99"]:.2f} мс, '
+            f'запросов {result["queries"]["p50"]}, '
+            f'байт {result["bytes"]["p50"]}, '
+            f'попаданий в кеш {result["page_cache_hits"]}'
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import blobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в хранилище по хешу содержимого, '
+        'сливает одинаковые файлы и пересчитывает ссылки на них'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не меняя',
+        )
+
+    def handle(self, *args, **options):
+        moved, written, removed = blobs.dedupe(
+            options['chunk_size'], options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов: {moved}, записано {written} байт, '
+            f'удалено {removed} байт'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Полнотекстовый поиск работает только в SQLite')
+        search.ensure_triggers()
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Индекс поиска пересобран'))
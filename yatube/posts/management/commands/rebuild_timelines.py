@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import timelines
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок из Follow и Post'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='id пользователя, чью ленту нужно пересобрать',
+        )
+
+    def handle(self, *args, **options):
+        timelines.rebuild(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS('Ленты пересобраны'))
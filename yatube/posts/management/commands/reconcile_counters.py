@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters, stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики постов, комментариев, подписок и счётчики '
+        'лент в кеше с данными'
+    )
+
+    def handle(self, *args, **options):
+        fixed = stats.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Исправлено строк: {fixed}'))
+        fixed = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков лент: {fixed}'))
@@ -0,0 +1,367 @@
+import bisect
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts import cache_tags, counters, timelines
+from posts.markup import make_excerpt, render_text
+from posts.models import Comment, Follow, Group, Post, ProfileStats
+
+User = get_user_model()
+
+TEXT_POOL_SIZE = 2000
+SENTENCES_PER_TEXT = (1, 8)
+COMMENT_DELAY = timedelta(days=7)
+
+
+def cum_weights(size, alpha):
+    """Накопленные веса закона Ципфа: i-й по популярности элемент
+    выбирается в (i + 1) ** alpha раз реже первого."""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** alpha for rank in range(size)))
+
+
+def ranked_choices(rng, population, weights, k):
+    """k элементов population с весами cum_weights; порядок population
+    задаёт, какие элементы окажутся популярными."""
+    total = weights[-1]
+    return [
+        population[bisect.bisect(weights, rng.random() * total)]
+        for _ in range(k)
+    ]
+
+
+def bulk_insert(model, objects, batch_size):
+    """bulk_create пачками: сам bulk_create превращает генератор в
+    список, и миллионы моделей не поместились бы в память."""
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            break
+        model.objects.bulk_create(batch)
+
+
+def dated_insert(model, objects, batch_size, field):
+    """bulk_insert для модели с auto_now_add в field: bulk_create
+    ставит туда текущее время, поэтому заданные даты пачки пишутся
+    следом одним bulk_update. Поле модели при этом не меняется."""
+    last_pk = model.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            break
+        dates = [getattr(obj, field) for obj in batch]
+        model.objects.bulk_create(batch)
+        # SQLite не возвращает id из bulk_create; строки пачки — это
+        # следующие id по порядку вставки.
+        pks = list(
+            model.objects
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:len(batch)]
+        )
+        for obj, pk, date in zip(batch, pks, dates):
+            obj.pk = pk
+            setattr(obj, field, date)
+        model.objects.bulk_update(batch, [field])
+        last_pk = pks[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу пользователями, группами, постами, подписками и '
+        'комментариями через bulk_create; популярность авторов и постов '
+        'распределена по закону Ципфа. Например: --users 100000 '
+        '--posts 5000000 --comments 5000000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок на пользователя')
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Показатель степени распределения популярности')
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределены даты постов')
+        parser.add_argument(
+            '--timeline-users', type=int, default=0,
+            help='Скольким самым активным подписчикам собрать ленты; '
+                 '0 — всем')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed_')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        if User.objects.filter(
+                username__startswith=options['prefix']).exists():
+            raise CommandError(
+                f'Пользователи с префиксом {options["prefix"]} уже есть')
+        self.rng = random.Random(options['seed'])
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(options['seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+
+        user_ids = self.step('Пользователи', self.create_users)
+        group_ids = self.step('Группы', self.create_groups)
+        # Порядок в ranked задаёт популярность: самые плодовитые авторы
+        # одновременно и самые читаемые.
+        ranked = user_ids[:]
+        self.rng.shuffle(ranked)
+        weights = cum_weights(len(ranked), options['alpha'])
+        follows = self.step(
+            'Подписки', self.create_follows, ranked, weights)
+        comment_targets = self.plan_comments()
+        post_ids, authors, groups = self.step(
+            'Посты', self.create_posts, ranked, weights, group_ids,
+            comment_targets,
+        )
+        self.step(
+            'Комментарии', self.create_comments, user_ids, post_ids,
+            comment_targets,
+        )
+        self.step(
+            'Статистика', self.create_stats, user_ids, authors, follows)
+        self.step('Ленты подписок', self.build_timelines, follows)
+        self.invalidate(user_ids, groups)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(user_ids)}, групп: {len(group_ids)}, '
+            f'постов: {len(post_ids)}, подписок: {len(follows)}, '
+            f'комментариев: {len(comment_targets)}'
+        ))
+
+    def step(self, title, function, *args):
+        started = time.perf_counter()
+        with transaction.atomic():
+            result = function(*args)
+        self.stdout.write(
+            f'{title}: {time.perf_counter() - started:.1f} с')
+        return result
+
+    def create_users(self):
+        prefix = self.options['prefix']
+        # Хеш вычисляется один раз: make_password на каждого
+        # пользователя заняла бы большую часть времени.
+        password = make_password(None)
+        bulk_insert(
+            User,
+            (
+                User(
+                    username=f'{prefix}{number}',
+                    first_name=self.faker.first_name(),
+                    last_name=self.faker.last_name(),
+                    password=password,
+                )
+                for number in range(self.options['users'])
+            ),
+            self.batch_size,
+        )
+        return list(
+            User.objects
+            .filter(username__startswith=prefix)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def create_groups(self):
+        prefix = self.options['prefix']
+        Group.objects.bulk_create(
+            [
+                Group(
+                    title=self.faker.catch_phrase()[:200],
+                    slug=f'{prefix}{number}',
+                    description=self.faker.paragraph(),
+                )
+                for number in range(self.options['groups'])
+            ],
+            batch_size=self.batch_size,
+        )
+        return list(
+            Group.objects
+            .filter(slug__startswith=prefix)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def create_follows(self, ranked, weights):
+        """Подписчики и авторы выбираются по одному распределению:
+        немногие подписаны на многих, немногих читают многие."""
+        total = self.options['follows'] * len(ranked)
+        pairs = set()
+        for _ in range(10):
+            missing = total - len(pairs)
+            if missing <= 0:
+                break
+            pairs.update(
+                pair for pair in zip(
+                    ranked_choices(self.rng, ranked[::-1], weights, missing),
+                    ranked_choices(self.rng, ranked, weights, missing),
+                )
+                if pair[0] != pair[1]
+            )
+        follows = sorted(pairs)[:total]
+        bulk_insert(
+            Follow,
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in follows
+            ),
+            self.batch_size,
+        )
+        return follows
+
+    def plan_comments(self):
+        """Номера комментируемых постов; обсуждаемые посты раскиданы по
+        всей ленте, а не собраны в её начале."""
+        total_posts = self.options['posts']
+        if not total_posts:
+            return []
+        order = list(range(total_posts))
+        self.rng.shuffle(order)
+        return ranked_choices(
+            self.rng, order, cum_weights(total_posts, self.options['alpha']),
+            self.options['comments'],
+        )
+
+    def texts(self):
+        texts = []
+        for _ in range(TEXT_POOL_SIZE):
+            text = ' '.join(self.faker.sentences(
+                self.rng.randint(*SENTENCES_PER_TEXT)))
+            if self.rng.random() < 0.3:
+                text += '\n\n' + self.faker.paragraph()
+            texts.append((text, render_text(text), make_excerpt(text)))
+        return texts
+
+    def create_posts(self, ranked, weights, group_ids, comment_targets):
+        total = self.options['posts']
+        comments_count = [0] * total
+        for number in comment_targets:
+            comments_count[number] += 1
+        authors = ranked_choices(self.rng, ranked, weights, total)
+        groups = [
+            self.rng.choice(group_ids)
+            if group_ids and self.rng.random() < 0.7 else None
+            for _ in range(total)
+        ]
+        texts = self.texts()
+        now = timezone.now()
+        start = now - timedelta(days=self.options['days'])
+        step = (now - start) / max(total, 1)
+        self.dates = start, step
+        last_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        # Даты растут вместе с id, как у постов, созданных по одному.
+        posts = (
+            Post(
+                author_id=authors[number],
+                group_id=groups[number],
+                text=text,
+                text_html=text_html,
+                excerpt=excerpt,
+                pub_date=start + step * number,
+                comments_count=comments_count[number],
+            )
+            for number, (text, text_html, excerpt) in zip(
+                range(total), itertools.cycle(texts))
+        )
+        dated_insert(Post, posts, self.batch_size, 'pub_date')
+        post_ids = list(
+            Post.objects
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        return post_ids, authors, set(filter(None, groups))
+
+    def create_comments(self, user_ids, post_ids, comment_targets):
+        start, step = self.dates
+        now = timezone.now()
+        sentences = self.faker.sentences(TEXT_POOL_SIZE)
+
+        def comments():
+            for number in comment_targets:
+                created = (
+                    start + step * number + COMMENT_DELAY * self.rng.random())
+                yield Comment(
+                    post_id=post_ids[number],
+                    author_id=self.rng.choice(user_ids),
+                    text=self.rng.choice(sentences),
+                    created=min(created, now),
+                )
+
+        dated_insert(Comment, comments(), self.batch_size, 'created')
+
+    def create_stats(self, user_ids, authors, follows):
+        """bulk_create не шлёт post_save, поэтому ProfileStats
+        создаются здесь с уже посчитанными значениями."""
+        posts = dict.fromkeys(user_ids, 0)
+        followers = dict.fromkeys(user_ids, 0)
+        following = dict.fromkeys(user_ids, 0)
+        for author_id in authors:
+            posts[author_id] += 1
+        for user_id, author_id in follows:
+            following[user_id] += 1
+            followers[author_id] += 1
+        bulk_insert(
+            ProfileStats,
+            (
+                ProfileStats(
+                    user_id=user_id,
+                    posts_count=posts[user_id],
+                    followers_count=followers[user_id],
+                    following_count=following[user_id],
+                )
+                for user_id in user_ids
+            ),
+            self.batch_size,
+        )
+
+    def build_timelines(self, follows):
+        following = {}
+        for user_id, _ in follows:
+            following[user_id] = following.get(user_id, 0) + 1
+        user_ids = sorted(following, key=following.get, reverse=True)
+        limit = self.options['timeline_users']
+        if limit and limit < len(user_ids):
+            self.stderr.write(self.style.WARNING(
+                f'Ленты собраны для {limit} из {len(user_ids)} '
+                f'подписчиков; у остальных лента подписок пуста, пока '
+                f'её не соберёт timelines.rebuild()'
+            ))
+            user_ids = user_ids[:limit]
+        timelines.rebuild(user_ids)
+
+    def invalidate(self, user_ids, group_ids):
+        """Сбрасывает счётчики лент и поколения тегов, которые сигналы
+        обновили бы при создании записей по одной."""
+        keys = [counters.make_key(counters.ALL)]
+        tags = [cache_tags.FEED]
+        for group_id in group_ids:
+            keys.append(counters.make_key(counters.GROUP, group_id))
+            tags.append(cache_tags.make_tag(cache_tags.GROUP, group_id))
+        for user_id in user_ids:
+            keys.append(counters.make_key(counters.FOLLOWER, user_id))
+            tags.append(cache_tags.make_tag(cache_tags.AUTHOR, user_id))
+            tags.append(cache_tags.make_tag(cache_tags.FOLLOWER, user_id))
+        counters.invalidate(keys)
+        cache_tags.bump(tags)
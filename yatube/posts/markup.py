@@ -0,0 +1,20 @@
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 300
+
+
+def render_text(text):
+    """HTML текста поста: экранированный текст, разбитый на абзацы."""
+    return linebreaks(text, autoescape=True)
+
+
+def make_excerpt(text):
+    """Анонс для лент: текст в одну строку не длиннее EXCERPT_LENGTH."""
+    return Truncator(' '.join(text.split())).chars(EXCERPT_LENGTH)
+
+
+def fill_rendered(post):
+    """Записывает в пост HTML и анонс его текста."""
+    post.text_html = render_text(post.text)
+    post.excerpt = make_excerpt(post.text)
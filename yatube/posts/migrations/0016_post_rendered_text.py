@@ -0,0 +1,60 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:54
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 300
+
+
+# Копии posts.markup на момент миграции: её результат не должен
+# зависеть от того, как markup изменится позже.
+def render_text(text):
+    return linebreaks(text, autoescape=True)
+
+
+def make_excerpt(text):
+    return Truncator(' '.join(text.split())).chars(EXCERPT_LENGTH)
+
+
+def fill_rendered(apps, schema_editor):
+    # Порциями по первичному ключу: в памяти не больше BATCH_SIZE постов,
+    # и таблица не меняется под открытым курсором чтения.
+    Post = apps.get_model('posts', 'Post')
+    last_pk = 0
+    while True:
+        posts = list(
+            Post.objects
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', 'text')[:BATCH_SIZE]
+        )
+        if not posts:
+            break
+        for post in posts:
+            post.text_html = render_text(post.text)
+            post.excerpt = make_excerpt(post.text)
+        Post.objects.bulk_update(posts, ['text_html', 'excerpt'])
+        last_pk = posts[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_image_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(fill_rendered, migrations.RunPython.noop),
+    ]
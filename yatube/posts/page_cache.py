@@ -0,0 +1,192 @@
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from . import cache_tags, personal
+
+HEADER = 'X-Page-Cache'
+VIEWS = {
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:comments',
+    'posts:index_fragment',
+    'posts:group_fragment',
+    'posts:profile_fragment',
+    'api_v1:posts',
+    'api_v1:group_posts',
+    'api_v1:profile_posts',
+}
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+# Заголовки, которые пересчитываются при отдаче из кеша
+SKIPPED_HEADERS = {
+    'content-length', 'content-encoding', 'set-cookie', 'etag',
+    'last-modified',
+}
+
+
+def depend(request, tags):
+    """Отмечает, что страница зависит от тегов posts.cache_tags.
+
+    Страница попадает в кеш, только если объявила хотя бы один тег.
+    Поколения читаются сразу, рядом с данными представления, а не
+    после отрисовки: иначе страница, собранная до смены поколения,
+    сохранилась бы с новым и считалась бы свежей.
+    """
+    if request is None:
+        return
+    versions = getattr(request, '_page_cache_versions', None)
+    if versions is None:
+        versions = request._page_cache_versions = {}
+    new_tags = [tag for tag in tags if tag not in versions]
+    if new_tags:
+        versions.update(cache_tags.get_versions(new_tags))
+
+
+def _key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'posts:page:{digest}'
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if CookieStorage.cookie_name in request.COOKIES:
+        return False
+    if settings.DEBUG and request.META.get('REMOTE_ADDR') in (
+            settings.INTERNAL_IPS):
+        # Этим адресам debug_toolbar встраивает панель в страницу.
+        return False
+    try:
+        return resolve(request.path_info).view_name in VIEWS
+    except Resolver404:
+        return False
+
+
+def _is_cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and getattr(request, '_page_cache_versions', None)
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def _store(request, response):
+    entry = {
+        'versions': request._page_cache_versions,
+        'body': gzip.compress(response.content),
+        'personal': bool(personal.PLACEHOLDER.search(
+            response.content.decode(response.charset))),
+        'etag': response.get('ETag'),
+        'headers': [
+            (name, value) for name, value in response.items()
+            if name.lower() not in SKIPPED_HEADERS
+        ],
+    }
+    cache.set(_key(request), entry, settings.PAGE_CACHE_TIMEOUT)
+    return entry
+
+
+def _personal_etag(request, etag, states):
+    """ETag общей страницы с блоками пользователя: из ETag записи,
+    пользователя, его CSRF-секрета (после входа формы в старой копии
+    недействительны) и состояний блоков."""
+    user = request.user
+    parts = [
+        etag, user.pk, user.get_username(),
+        request.META.get('CSRF_COOKIE'), states,
+    ]
+    return f'"{hashlib.md5(repr(parts).encode()).hexdigest()}"'
+
+
+def _from_entry(request, entry, state):
+    response = HttpResponse()
+    for name, value in entry['headers']:
+        response[name] = value
+    body, content, etag = entry['body'], None, entry['etag']
+    if entry['personal']:
+        content, states = personal.fill(
+            request, gzip.decompress(body).decode(response.charset))
+        content = content.encode(response.charset)
+        if etag:
+            etag = _personal_etag(request, etag, states)
+    last_modified = None
+    if etag:
+        response['ETag'] = etag
+        if not request.user.is_authenticated:
+            last_modified = int(
+                cache_tags.last_modified(entry['versions']).timestamp())
+            response['Last-Modified'] = http_date(last_modified)
+    if ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        response.content = (
+            body if content is None else gzip.compress(content))
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response.content = (
+            gzip.decompress(body) if content is None else content)
+    response['Content-Length'] = str(len(response.content))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response[HEADER] = state
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified,
+        response=response,
+    )
+
+
+def _fill(request, response):
+    if response.streaming or not response.content:
+        return
+    content, states = personal.fill(
+        request, response.content.decode(response.charset))
+    if states:
+        response.content = content
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+
+
+class PageCacheMiddleware:
+    """Кеширует ленты и посты целиком, общие для всех читателей.
+
+    Персональные блоки (меню пользователя, кнопки подписки и
+    редактирования, форма комментария) шаблоны выводят тегом
+    {% personal %}: в кешируемой странице на их месте остаются метки,
+    которые заполняются для каждого запроса отдельно. Тела хранятся
+    сжатыми gzip, ключ — путь с query-строкой. Запись годна, пока не
+    сменились поколения её тегов: их меняют сигналы сохранения и
+    удаления постов, комментариев, групп, подписок и пользователей.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _is_cacheable_request(request):
+            return self.get_response(request)
+        request._page_cache_holes = True
+        key = _key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            versions = entry['versions']
+            if cache_tags.get_versions(list(versions)) == versions:
+                return _from_entry(request, entry, 'HIT')
+            cache.delete(key)
+        response = self.get_response(request)
+        if _is_cacheable_response(request, response):
+            return _from_entry(request, _store(request, response), 'MISS')
+        _fill(request, response)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response[HEADER] = 'MISS'
+        return response
@@ -0,0 +1,232 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject, cached_property
+
+from . import counters
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _encode_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор, который листает ленту по ключу (pub_date, id).
+
+    Переход по курсору выбирает страницу условием на индексированные
+    поля вместо OFFSET, поэтому далёкие страницы стоят столько же,
+    сколько первая. Страницы с номером (?page=N) работают как раньше.
+    """
+
+    ELLIPSIS = '…'
+    # Число строк известно точно; иначе последняя страница неизвестна
+    count_is_exact = True
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'id'),
+                 **kwargs):
+        self.keys = keys
+        object_list = object_list.order_by(*(f'-{key}' for key in keys))
+        super().__init__(object_list, per_page, **kwargs)
+
+    def _get_page(self, *args, **kwargs):
+        page = super()._get_page(*args, **kwargs)
+        # Номера для ссылок считаются, только если шаблон их выводит
+        page.page_window = SimpleLazyObject(
+            lambda: self.get_page_window(page.number))
+        return page
+
+    def get_page_window(self, number, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг number и по краям, пропуски — ELLIPSIS.
+
+        Вместо всего page_range выдаётся не больше
+        2 * (on_each_side + on_ends) + 3 элементов. Если число строк
+        известно лишь приблизительно, хвост заменяется на ELLIPSIS.
+        """
+        num_pages = self.num_pages
+        start = max(number - on_each_side, 1)
+        end = max(min(number + on_each_side, num_pages), number)
+        if start > on_ends + 2:
+            pages = [*range(1, on_ends + 1), self.ELLIPSIS]
+        else:
+            pages = list(range(1, start))
+        pages.extend(range(start, end + 1))
+        if not self.count_is_exact:
+            pages.append(self.ELLIPSIS)
+        elif end < num_pages - on_ends - 1:
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+        else:
+            pages.extend(range(end + 1, num_pages + 1))
+        return pages
+
+    def get_page(self, number=None, cursor=None):
+        if cursor:
+            try:
+                return self.page_from_cursor(cursor)
+            except InvalidCursor:
+                pass
+        page = super().get_page(number)
+        self._set_cursors(
+            page,
+            has_previous=page.has_previous(),
+            has_next=self._has_next(page),
+        )
+        return page
+
+    def _has_next(self, page):
+        return page.has_next()
+
+    def page_from_cursor(self, cursor):
+        direction, number, values = self.decode_cursor(cursor)
+        forward = direction == 'n'
+        lookup = 'lt' if forward else 'gt'
+        queryset = self.object_list.filter(self._after(values, lookup))
+        if not forward:
+            queryset = queryset.reverse()
+        rows = list(queryset[:self.per_page + 1])
+        if not rows:
+            raise InvalidCursor
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            has_previous, has_next = True, has_more
+        else:
+            rows.reverse()
+            has_previous, has_next = has_more, True
+            if not has_more:
+                number = 1
+        page = self._get_page(rows, max(number, 1), self)
+        self._set_cursors(page, has_previous=has_previous, has_next=has_next)
+        return page
+
+    def _after(self, values, lookup):
+        """Условие «строго после ключа» для сортировки по убыванию."""
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            step = Q(**{f'{key}__{lookup}': values[i]})
+            for prev_key, prev_value in zip(self.keys[:i], values):
+                step &= Q(**{prev_key: prev_value})
+            condition |= step
+        return condition
+
+    def _set_cursors(self, page, has_previous, has_next):
+        rows = list(page.object_list)
+        page.previous_cursor = page.next_cursor = None
+        if rows and has_previous:
+            page.previous_cursor = self.encode_cursor(
+                'p', page.number - 1, rows[0])
+        if rows and has_next:
+            page.next_cursor = self.encode_cursor(
+                'n', page.number + 1, rows[-1])
+
+    def key_values(self, row):
+        """Значения ключей сортировки для строки страницы."""
+        return [getattr(row, key) for key in self.keys]
+
+    def encode_cursor(self, direction, number, row):
+        values = [_encode_value(value) for value in self.key_values(row)]
+        data = json.dumps([direction, number, *values]).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, number, *values = json.loads(data)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise InvalidCursor
+        if (direction not in ('n', 'p') or not isinstance(number, int)
+                or len(values) != len(self.keys)):
+            raise InvalidCursor
+        return direction, number, self._key_values(values)
+
+    def _key_values(self, values):
+        """Приводит значения курсора к типам полей ключа: подделанный
+        курсор не должен доходить до запроса."""
+        model = self.object_list.model
+        converted = []
+        for key, value in zip(self.keys, values):
+            if value is None:
+                raise InvalidCursor
+            try:
+                value = model._meta.get_field(key).to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise InvalidCursor
+            converted.append(value)
+        return converted
+
+
+class BatchPaginator(CursorPaginator):
+    """Пагинатор для «Показать ещё»: листает только вперёд и не считает
+    строки, поэтому порция стоит одинаково при любом их числе."""
+
+    def get_batch(self, cursor=None):
+        """Возвращает строки порции и курсор следующей (или None)."""
+        queryset = self.object_list
+        if cursor:
+            try:
+                _, _, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+            else:
+                queryset = queryset.filter(self._after(values, 'lt'))
+        rows = list(queryset[:self.per_page + 1])
+        if len(rows) <= self.per_page:
+            return rows, None
+        rows = rows[:self.per_page]
+        return rows, self.encode_cursor('n', 0, rows[-1])
+
+
+class CountingPaginator(CursorPaginator):
+    """Пагинатор, который берёт число постов из хранилища счётчиков
+    или готовым значением count (например, ProfileStats.posts_count).
+
+    Счётчик мог отстать от ленты, а число выше FEED_COUNT_LIMIT —
+    только оценка снизу. Поэтому последняя посчитанная страница
+    не обрезается по count, и если она полна, следующая строка
+    ищется в базе. Номер страницы дальше count сводится к последней
+    посчитанной странице, а дальше лента листается курсором.
+    """
+
+    def __init__(self, object_list, per_page, scope=None, count=None,
+                 **kwargs):
+        self.scope = scope
+        self.known_count = count
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        scope, pk = self.scope
+        return counters.get_count(scope, pk, self.object_list)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
+
+    def _has_next(self, page):
+        if page.has_next():
+            return True
+        rows = list(page.object_list)
+        return len(rows) == self.per_page and self.object_list.filter(
+            self._after(self.key_values(rows[-1]), 'lt')).exists()
+
+    @property
+    def count_is_exact(self):
+        if self.known_count is not None:
+            return True
+        # От FEED_COUNT_LIMIT строк counters.get_count даёт оценку снизу
+        return self.count < settings.FEED_COUNT_LIMIT
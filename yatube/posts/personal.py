@@ -0,0 +1,98 @@
+import base64
+import json
+import re
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .forms import CommentForm
+from .models import Follow
+
+# Метка на месте персонального блока в общей странице. Текст постов и
+# комментариев экранируется шаблонами, поэтому «<!--» из него не придёт.
+PLACEHOLDER = re.compile(r'<!--personal:(\w+):([\w=-]*)-->')
+
+FRAGMENTS = {}
+
+
+def fragment(name, template_name):
+    """Регистрирует персональный блок: функция по запросу и аргументам
+    метки возвращает контекст для шаблона template_name."""
+
+    def decorator(func):
+        FRAGMENTS[name] = (template_name, func)
+        return func
+
+    return decorator
+
+
+def placeholder(name, **kwargs):
+    """Метка, которую PageCacheMiddleware заменит на блок name."""
+    payload = base64.urlsafe_b64encode(json.dumps(kwargs).encode()).decode()
+    return mark_safe(f'<!--personal:{name}:{payload}-->')
+
+
+def _render(request, name, kwargs):
+    template_name, func = FRAGMENTS[name]
+    context = func(request, **kwargs)
+    return render_to_string(template_name, context, request=request), context
+
+
+def render(request, name, **kwargs):
+    return _render(request, name, kwargs)[0]
+
+
+def _state(context):
+    """Простые значения контекста блока. По ним, а не по HTML, строится
+    ETag: в HTML форм каждый раз новая маска {% csrf_token %}."""
+    return sorted(
+        (key, value) for key, value in context.items()
+        if value is None or isinstance(value, (bool, int, str))
+    )
+
+
+def fill(request, content):
+    """Подставляет в общую страницу блоки текущего пользователя.
+
+    Возвращает новое содержимое и состояния отрисованных блоков.
+    """
+    states = []
+
+    def replace(match):
+        name, payload = match.groups()
+        kwargs = json.loads(base64.urlsafe_b64decode(payload))
+        html, context = _render(request, name, kwargs)
+        states.append((name, payload, _state(context)))
+        return html
+
+    content = PLACEHOLDER.sub(replace, content)
+    return content, states
+
+
+@fragment('user_menu', 'includes/user_menu.html')
+def user_menu(request, view_name):
+    return {'view_name': view_name}
+
+
+@fragment('feed_tabs', 'posts/includes/switcher.html')
+def feed_tabs(request, index=False, follow=False):
+    return {'index': index, 'follow': follow}
+
+
+@fragment('follow_button', 'posts/includes/follow_button.html')
+def follow_button(request, author_id, username):
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(
+            user=request.user, author_id=author_id).exists()
+    )
+    return {'username': username, 'following': following}
+
+
+@fragment('post_actions', 'posts/includes/post_actions.html')
+def post_actions(request, post_id, author_id):
+    return {
+        'post_id': post_id,
+        'is_author': request.user.pk == author_id,
+        'form': CommentForm(),
+    }
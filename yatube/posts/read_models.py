@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.db.models.query import ValuesListIterable
+
+from .models import Post
+
+POST_FIELDS = (
+    'id', 'pub_date', 'excerpt', 'comments_count', 'image', 'image_width',
+    'image_height', 'author_id', 'group_id',
+)
+AUTHOR_FIELDS = ('author__username', 'author__first_name', 'author__last_name')
+GROUP_FIELDS = ('group__slug', 'group__title')
+FIELDS = POST_FIELDS + AUTHOR_FIELDS + GROUP_FIELDS
+
+IMAGE_FIELD = Post._meta.get_field('image')
+
+
+@dataclass
+class AuthorRow:
+    __slots__ = ('id', 'username', 'first_name', 'last_name')
+    id: int
+    username: str
+    first_name: str
+    last_name: str
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+
+@dataclass
+class GroupRow:
+    __slots__ = ('id', 'slug', 'title')
+    id: int
+    slug: str
+    title: str
+
+    @property
+    def pk(self):
+        return self.id
+
+
+@dataclass
+class PostRow:
+    """Пост ленты только с полями, которые выводят шаблоны лент."""
+
+    __slots__ = (
+        'id', 'pub_date', 'excerpt', 'comments_count', 'image',
+        'image_width', 'image_height', 'author_id', 'group_id', 'author',
+        'group',
+    )
+    id: int
+    pub_date: datetime
+    excerpt: str
+    comments_count: int
+    image: FieldFile
+    image_width: Optional[int]
+    image_height: Optional[int]
+    author_id: Optional[int]
+    group_id: Optional[int]
+    author: Optional[AuthorRow]
+    group: Optional[GroupRow]
+
+    @property
+    def pk(self):
+        return self.id
+
+    @classmethod
+    def from_values(cls, values):
+        (
+            pk, pub_date, excerpt, comments_count, image, width, height,
+            author_id, group_id, username, first_name, last_name, slug,
+            title,
+        ) = values
+        author = group = None
+        if author_id is not None:
+            author = AuthorRow(author_id, username, first_name, last_name)
+        if group_id is not None:
+            group = GroupRow(group_id, slug, title)
+        row = cls(
+            pk, pub_date, excerpt, comments_count, None, width, height,
+            author_id, group_id, author, group,
+        )
+        # FieldFile берёт размеры для <img> из row.image_width/height
+        row.image = FieldFile(row, IMAGE_FIELD, image)
+        return row
+
+
+class PostRowIterable(ValuesListIterable):
+    def __iter__(self):
+        for values in super().__iter__():
+            yield PostRow.from_values(values)
+
+
+def post_rows(queryset):
+    """QuerySet постов, который отдаёт PostRow одним запросом с JOIN
+    автора и группы вместо моделей Post."""
+    queryset = queryset.values_list(*FIELDS)
+    queryset._iterable_class = PostRowIterable
+    return queryset
+
+
+def feed(queryset):
+    """Посты для лент: PostRow при POST_FEED_READ_MODELS, иначе модели
+    без полного текста."""
+    if settings.POST_FEED_READ_MODELS:
+        return post_rows(queryset)
+    return queryset.defer('text')
+
+
+def timeline(queryset):
+    """Записи ленты подписок для пагинации: при POST_FEED_READ_MODELS
+    только ключ ленты (посты потом читает timeline_posts), иначе
+    сразу с постами без полного текста, авторами и группами."""
+    if settings.POST_FEED_READ_MODELS:
+        return queryset.only('pub_date', 'post')
+    return queryset.select_related(
+        'post__author', 'post__group').defer('post__text')
+
+
+def timeline_posts(entries):
+    """Посты страницы ленты подписок в её порядке: PostRow одним
+    запросом по первичному ключу или посты из select_related."""
+    if not settings.POST_FEED_READ_MODELS:
+        return [entry.post for entry in entries]
+    post_ids = [entry.post_id for entry in entries]
+    rows = {
+        row.id: row
+        for row in post_rows(Post.objects.filter(pk__in=post_ids).order_by())
+    }
+    return [rows[post_id] for post_id in post_ids if post_id in rows]
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import blobs, cache_tags, counters, images, markup, stats, timelines
+from .models import Comment, Follow, Group, Post, ProfileStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        ProfileStats.objects.get_or_create(user=instance)
+    elif update_fields is None or set(update_fields) != {'last_login'}:
+        cache_tags.bump([cache_tags.make_tag(cache_tags.AUTHOR, instance.pk)])
+
+
+@receiver((post_save, post_delete), sender=Group)
+def group_changed(sender, instance, **kwargs):
+    cache_tags.bump([cache_tags.make_tag(cache_tags.GROUP, instance.pk)])
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    # Новый файл запишет хранилище и само возьмёт на него ссылку
+    instance._image_uploaded = (
+        bool(instance.image) and not instance.image._committed)
+    if not raw:
+        images.fill_metadata(instance)
+        markup.fill_rendered(instance)
+    saved = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image').first() if instance.pk else None
+    instance._saved_group_id, instance._saved_image = saved or (None, '')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    tags = [cache_tags.FEED, *cache_tags.post_tags(instance)]
+    if (instance.image.name or '') != instance._saved_image:
+        blobs.release(instance._saved_image)
+        if not instance._image_uploaded:
+            blobs.acquire(instance.image.name)
+    elif instance._image_uploaded:
+        # Пост уже ссылался на тот же файл: лишняя ссылка хранилища
+        blobs.release(instance.image.name)
+    if created:
+        follower_ids = timelines.fan_out_post(instance)
+        stats.change_profile(instance.author_id, posts_count=1)
+        counters.change(counters.post_keys(instance.group_id), 1)
+        counters.invalidate(counters.follower_keys(follower_ids))
+        cache_tags.bump(tags + [
+            cache_tags.make_tag(cache_tags.FOLLOWER, user_id)
+            for user_id in follower_ids
+        ])
+        return
+    old_group_id = instance._saved_group_id
+    if old_group_id is not None:
+        tags.append(cache_tags.make_tag(cache_tags.GROUP, old_group_id))
+    cache_tags.bump(tags)
+    if old_group_id != instance.group_id:
+        if old_group_id is not None:
+            counters.change(
+                [counters.make_key(counters.GROUP, old_group_id)], -1)
+        if instance.group_id is not None:
+            counters.change(
+                [counters.make_key(counters.GROUP, instance.group_id)], 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    blobs.release(instance.image.name)
+    stats.change_profile(instance.author_id, posts_count=-1)
+    counters.change(counters.post_keys(instance.group_id), -1)
+    follower_ids = list(
+        Follow.objects
+        .filter(author_id=instance.author_id)
+        .values_list('user_id', flat=True)
+    )
+    counters.invalidate(counters.follower_keys(follower_ids))
+    cache_tags.bump([cache_tags.FEED, *cache_tags.post_tags(instance)] + [
+        cache_tags.make_tag(cache_tags.FOLLOWER, user_id)
+        for user_id in follower_ids
+    ])
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        timelines.backfill(instance.user_id, instance.author_id)
+        stats.change_profile(instance.author_id, followers_count=1)
+        stats.change_profile(instance.user_id, following_count=1)
+        counters.invalidate(counters.follower_keys([instance.user_id]))
+        cache_tags.bump(_follow_tags(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timelines.remove_author(instance.user_id, instance.author_id)
+    stats.change_profile(instance.author_id, followers_count=-1)
+    stats.change_profile(instance.user_id, following_count=-1)
+    counters.invalidate(counters.follower_keys([instance.user_id]))
+    cache_tags.bump(_follow_tags(instance))
+
+
+def _follow_tags(follow):
+    # Профиль подписчика показывает число его подписок.
+    return [
+        cache_tags.make_tag(cache_tags.FOLLOWER, follow.user_id),
+        cache_tags.make_tag(cache_tags.AUTHOR, follow.author_id),
+        cache_tags.make_tag(cache_tags.AUTHOR, follow.user_id),
+    ]
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        stats.change_comments(instance.post_id, 1)
+        cache_tags.bump(
+            [cache_tags.make_tag(cache_tags.POST, instance.post_id)])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    stats.change_comments(instance.post_id, -1)
+    cache_tags.bump([cache_tags.make_tag(cache_tags.POST, instance.post_id)])
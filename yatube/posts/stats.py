@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, ProfileStats
+
+User = get_user_model()
+
+
+def _shift(field, delta):
+    """Сдвиг счётчика, который не уходит ниже нуля: после массового
+    удаления или пропущенного сигнала он мог уже обнулиться, и
+    отрицательное значение нарушило бы ограничение поля."""
+    if delta < 0:
+        return Greatest(F(field) + delta, 0)
+    return F(field) + delta
+
+
+def change_profile(user_id, **deltas):
+    """Атомарно сдвигает счётчики автора через F-выражения.
+
+    Строка создаётся только при увеличении счётчиков, чтобы не
+    воскрешать статистику пользователя, который удаляется каскадом.
+    """
+    changes = {field: _shift(field, delta) for field, delta in deltas.items()}
+    updated = ProfileStats.objects.filter(user_id=user_id).update(**changes)
+    if not updated and min(deltas.values()) > 0:
+        ProfileStats.objects.get_or_create(user_id=user_id)
+        ProfileStats.objects.filter(user_id=user_id).update(**changes)
+
+
+def for_user(user):
+    """Возвращает счётчики пользователя, создавая их при отсутствии."""
+    try:
+        return user.stats
+    except ProfileStats.DoesNotExist:
+        return ProfileStats.objects.get_or_create(user=user)[0]
+
+
+def change_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=_shift('comments_count', delta)
+    )
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset
+            .filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def reconcile():
+    """Пересчитывает счётчики по данным и исправляет расхождения.
+
+    Возвращает число исправленных строк.
+    """
+    fixed = 0
+    existing = ProfileStats.objects.values_list('user_id', flat=True)
+    ProfileStats.objects.bulk_create(
+        [
+            ProfileStats(user_id=user_id)
+            for user_id in User.objects.exclude(pk__in=existing)
+            .values_list('pk', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    actual = (
+        ProfileStats.objects
+        .annotate(
+            actual_posts=_count(Post.objects, 'author'),
+            actual_followers=_count(Follow.objects, 'author'),
+            actual_following=_count(Follow.objects, 'user'),
+        )
+        .exclude(
+            posts_count=F('actual_posts'),
+            followers_count=F('actual_followers'),
+            following_count=F('actual_following'),
+        )
+    )
+    for stats in actual:
+        stats.posts_count = stats.actual_posts
+        stats.followers_count = stats.actual_followers
+        stats.following_count = stats.actual_following
+        stats.save(update_fields=(
+            'posts_count', 'followers_count', 'following_count'))
+        fixed += 1
+    posts = (
+        Post.objects
+        .annotate(actual_comments=_count(Comment.objects, 'post'))
+        .exclude(comments_count=F('actual_comments'))
+        .only('pk')
+    )
+    for post in posts:
+        Post.objects.filter(pk=post.pk).update(
+            comments_count=post.actual_comments)
+        fixed += 1
+    return fixed
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+# posts/ab/ab12…ef.jpg: каталог из двух первых символов SHA-256
+CONTENT_NAME = re.compile(r'^posts/([0-9a-f]{2})/\1[0-9a-f]{62}\.\w+$')
+
+
+def content_hash(content):
+    """SHA-256 содержимого; при загрузке его уже посчитал
+    ImageUploadHandler."""
+    digest = getattr(content, 'sha256', None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    content.seek(0)
+    return hasher.hexdigest()
+
+
+def content_name(digest, name):
+    extension = os.path.splitext(name)[1].lower()
+    return f'posts/{digest[:2]}/{digest}{extension}'
+
+
+def is_content_name(name):
+    return bool(CONTENT_NAME.match(name or ''))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит картинки постов под именем из хеша содержимого.
+
+    Одинаковые файлы сохраняются один раз, и у них общие миниатюры:
+    имя миниатюры в sorl зависит от имени исходника. Когда файл можно
+    удалить, решает posts.blobs по счётчику ссылок.
+    """
+
+    def save(self, name, content, max_length=None):
+        """Сохраняет файл и берёт на него ссылку.
+
+        Ссылка берётся в одной транзакции с проверкой файла:
+        posts.blobs удаляет файл тоже в транзакции и только при
+        нулевом счётчике. Поэтому файл либо уже удалён и будет
+        записан заново, либо не удалится. Сигнал post_save поста
+        эту ссылку не дублирует.
+        """
+        # blobs импортирует models, а models — этот модуль
+        from . import blobs
+
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = content_name(content_hash(content), name)
+        with transaction.atomic():
+            blobs.acquire(name)
+            if self.exists(name):
+                return name
+            return super().save(name, content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        if is_content_name(name):
+            # Параллельная загрузка того же файла записала бы
+            # то же содержимое, поэтому имя не меняется.
+            return name
+        return super().get_available_name(name, max_length)
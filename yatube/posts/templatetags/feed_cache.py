@@ -0,0 +1,58 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+
+from posts import cache_tags, page_cache
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, name, page, scope):
+        self.nodelist = nodelist
+        self.name = name
+        self.page = page
+        self.scope = scope
+
+    def render(self, context):
+        page = self.page.resolve(context)
+        scope = cache_tags.make_tag(
+            *(part.resolve(context) for part in self.scope))
+        tags = [scope]
+        for post in page:
+            tags.extend(cache_tags.post_tags(post))
+        page_cache.depend(context.get('request'), tags)
+        versions = cache_tags.get_versions(tags)
+        parts = [self.name.resolve(context), page.number]
+        parts.extend(f'{tag}={versions[tag]}' for tag in tags)
+        digest = hashlib.md5(repr(parts).encode()).hexdigest()
+        key = f'posts:fragment:{digest}'
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, settings.FRAGMENT_CACHE_TIMEOUT)
+        return content
+
+
+@register.tag
+def cache_feed(parser, token):
+    """Кеширует ленту постов с привязкой к тегам.
+
+    {% cache_feed 'index_page' page_obj 'feed' %} ... {% endcache_feed %}
+    {% cache_feed 'follow_page' page_obj 'follower' user.id %} ...
+
+    Ключ фрагмента включает имя, номер страницы, тег ленты и теги
+    каждого поста на странице, поэтому смена любого из них даёт
+    новый ключ, а старый фрагмент просто истекает.
+    """
+    bits = token.split_contents()
+    if len(bits) < 4:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает имя, страницу и тег ленты"
+        )
+    nodelist = parser.parse(('endcache_feed',))
+    parser.delete_first_token()
+    name, page, *scope = (parser.compile_filter(bit) for bit in bits[1:])
+    return FeedCacheNode(nodelist, name, page, scope)
@@ -0,0 +1,18 @@
+from django import template
+
+from posts import personal as fragments
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def personal(context, name, **kwargs):
+    """Персональный блок страницы из posts.personal.
+
+    Если страницу кеширует PageCacheMiddleware, вместо блока выводится
+    метка, и блок дорисовывается для каждого запроса отдельно.
+    """
+    request = context['request']
+    if getattr(request, '_page_cache_holes', False):
+        return fragments.placeholder(name, **kwargs)
+    return fragments.render(request, name, **kwargs)
@@ -0,0 +1,109 @@
+import hashlib
+from urllib.parse import quote
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import get_script_prefix, reverse
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.safestring import mark_safe
+
+from posts import cache_tags
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+# Значения, которые подставляются в reverse() и затем вырезаются
+SENTINELS = {
+    'profile_url': ('posts:profile', 'url-sentinel'),
+    'detail_url': ('posts:post_detail', 987654321),
+    'group_url': ('posts:group_list', 'url-sentinel'),
+}
+_url_prefixes = {}
+
+
+def _prefixes():
+    """Части адресов вокруг аргумента: reverse() вызывается по разу
+    на процесс и префикс скрипта, а не на каждую ссылку карточки."""
+    script_prefix = get_script_prefix()
+    if script_prefix not in _url_prefixes:
+        prefixes = {}
+        for name, (view_name, sentinel) in SENTINELS.items():
+            url = reverse(view_name, args=[sentinel])
+            prefixes[name] = tuple(url.split(str(sentinel)))
+        _url_prefixes[script_prefix] = prefixes
+    return _url_prefixes[script_prefix]
+
+
+def _url(prefixes, name, value):
+    prefix, suffix = prefixes[name]
+    return prefix + quote(str(value), safe=RFC3986_SUBDELIMS + '/~:@') + suffix
+
+
+def _key(post, versions, author_link):
+    parts = [versions[tag] for tag in cache_tags.post_tags(post)]
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'posts:card:{post.pk}:{int(author_link)}:{digest}'
+
+
+def _render(context, posts, author_link):
+    """Отрисовывает карточки за один проход одним скомпилированным
+    шаблоном. Узлы шаблона рендерятся в контексте страницы, чтобы
+    {% post_picture %} искал миниатюры разом для всего page_obj."""
+    card = context.template.engine.get_template(CARD_TEMPLATE)
+    prefixes = _prefixes()
+    cards = {}
+    for post in posts:
+        urls = {'detail_url': _url(prefixes, 'detail_url', post.pk)}
+        if post.author:
+            urls['profile_url'] = _url(
+                prefixes, 'profile_url', post.author.username)
+        if post.group:
+            urls['group_url'] = _url(prefixes, 'group_url', post.group.slug)
+        with context.push(post=post, author_link=author_link, **urls):
+            cards[post.pk] = card.nodelist.render(context)
+    return cards
+
+
+def _cards(context, posts, author_link):
+    """HTML карточек из кеша; недостающие отрисовываются и кладутся
+    в кеш. Ключ — id поста и поколения его тегов, поэтому правка
+    поста, автора или группы сбрасывает только их карточки."""
+    tags = set()
+    for post in posts:
+        tags.update(cache_tags.post_tags(post))
+    versions = cache_tags.get_versions(sorted(tags))
+    keys = {_key(post, versions, author_link): post for post in posts}
+    found = cache.get_many(keys)
+    missing = [post for key, post in keys.items() if key not in found]
+    rendered = _render(context, missing, author_link) if missing else {}
+    if rendered:
+        cache.set_many(
+            {
+                key: rendered[post.pk]
+                for key, post in keys.items() if post.pk in rendered
+            },
+            settings.FRAGMENT_CACHE_TIMEOUT,
+        )
+    return {
+        post.pk: found[key] if key in found else rendered[post.pk]
+        for key, post in keys.items()
+    }
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post, author_link=True):
+    """Карточка поста в ленте.
+
+    При первом вызове готовятся карточки всего page_obj, следующие
+    вызовы берут готовый HTML.
+    """
+    key = ('post_cards', author_link)
+    if key not in context.render_context:
+        page = list(context.get('page_obj') or [])
+        context.render_context[key] = (
+            _cards(context, page, author_link) if page else {})
+    cards = context.render_context[key]
+    if post.pk not in cards:
+        cards.update(_cards(context, [post], author_link))
+    return mark_safe(cards[post.pk])
@@ -0,0 +1,96 @@
+import logging
+
+from django import template
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts import thumbnails
+
+register = template.Library()
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+}
+# Карточки поста занимают всю ширину колонки, но не шире 960px
+SIZES = '(max-width: 960px) 100vw, 960px'
+
+
+def _find_variants(images):
+    """Готовые варианты для списка картинок одним обращением к KV."""
+    variants = thumbnails.variants()
+    found = default.backend.find_ready([
+        (image, geometry, options)
+        for image in images
+        for geometry, options in variants
+    ])
+    result = {}
+    for index, image in enumerate(images):
+        ready = found[index * len(variants):(index + 1) * len(variants)]
+        result[image.name] = [
+            (options['format'], thumbnail)
+            for (_, options), thumbnail in zip(variants, ready)
+            if thumbnail
+        ]
+    return result
+
+
+def _page_variants(context, image):
+    """Варианты картинки; на страницах ленты все картинки page_obj
+    ищутся разом при первом вызове и хранятся до конца отрисовки."""
+    key = 'post_picture_variants'
+    if key not in context.render_context:
+        page = context.get('page_obj') or []
+        context.render_context[key] = _find_variants(
+            [post.image for post in page if post.image])
+    page = context.render_context[key]
+    if image.name in page:
+        return page[image.name]
+    return _find_variants([image])[image.name]
+
+
+def _original(image):
+    """Исходная картинка с размерами из модели, чтобы шаблон
+    мог вывести width и height, не открывая файл.
+
+    Если размеры ещё не сохранены, они остаются пустыми.
+    """
+    original = ImageFile(image)
+    original.set_size(thumbnails.stored_size(image) or (None, None))
+    return original
+
+
+def _srcset(variants):
+    return ', '.join(
+        f'{thumbnail.url} {thumbnail.width}w' for thumbnail in variants)
+
+
+@register.inclusion_tag('posts/includes/picture.html', takes_context=True)
+def post_picture(context, post):
+    """Картинка поста в <picture> с вариантами по ширине и формату.
+
+    Варианты создаёт пул процессов из posts.thumbnails; пока их нет,
+    выводится исходная картинка.
+    """
+    if not post.image:
+        return {'image': None}
+    try:
+        variants = _page_variants(context, post.image)
+    except Exception:
+        logger.exception('Не удалось найти миниатюры для %s', post.image)
+        variants = []
+    by_format = {}
+    for format_, thumbnail in variants:
+        by_format.setdefault(format_, []).append(thumbnail)
+    fallback = by_format.pop('JPEG', None)
+    return {
+        'sources': [
+            {'type': MIME_TYPES[format_], 'srcset': _srcset(group)}
+            for format_, group in by_format.items()
+        ],
+        'image': fallback[-1] if fallback else _original(post.image),
+        'srcset': _srcset(fallback) if fallback else '',
+        'sizes': SIZES,
+    }
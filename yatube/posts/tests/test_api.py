@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from posts.page_cache import HEADER
+
+User = get_user_model()
+
+
+class FeedApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(5):
+            Post.objects.create(
+                author=cls.author,
+                text=f'test_post_{i}',
+                group=cls.group if i % 2 else None,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_pagination(self):
+        """Курсор проходит ленту целиком без повторов."""
+        urls = [
+            reverse('api_v1:posts'),
+            reverse('api_v1:profile_posts', args=['test_author']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                ids, cursor = [], ''
+                while cursor is not None:
+                    data = self.guest_client.get(
+                        url, {'limit': 2, 'cursor': cursor}).json()
+                    ids.extend(post['id'] for post in data['results'])
+                    cursor = data['next_cursor']
+                self.assertEqual(
+                    ids,
+                    list(Post.objects.values_list('id', flat=True)),
+                )
+
+    def test_fields(self):
+        """?fields= выбирает поля, неизвестные поля — ошибка 400."""
+        url = reverse('api_v1:group_posts', args=['test_slug'])
+        data = self.guest_client.get(url, {'fields': 'id,text,group'}).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(
+            data['results'][0],
+            {'id': 4, 'text': 'test_post_3', 'group': 'test_slug'},
+        )
+        response = self.guest_client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['detail'])
+
+    def test_etag_and_page_cache(self):
+        """Публичные ответы кешируются и отвечают 304 по ETag."""
+        url = reverse('api_v1:posts')
+        first = self.guest_client.get(url)
+        self.assertIn('public', first['Cache-Control'])
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        Post.objects.create(author=self.author, text='test_new')
+        self.assertEqual(self.guest_client.get(url)[HEADER], 'MISS')
+
+    def test_follow(self):
+        """Лента подписок только для авторизованных и не публичная."""
+        url = reverse('api_v1:follow_posts')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_not_found(self):
+        """Несуществующая группа — 404 в JSON."""
+        response = self.guest_client.get(
+            reverse('api_v1:group_posts', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('detail', response.json())
@@ -0,0 +1,107 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from posts import blobs
+from posts.models import ImageBlob, Post
+from posts.storage import is_content_name
+
+User = get_user_model()
+
+
+def make_image():
+    content = BytesIO()
+    Image.new('RGB', (8, 8), (255, 255, 0)).save(content, 'PNG')
+    return content.getvalue()
+
+
+@override_settings(POST_THUMBNAIL_WORKERS=0)
+class ImageBlobTests(TransactionTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+        self.author = User.objects.create_user(username='test_author')
+        self.storage = FileSystemStorage()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_post(self, image):
+        return Post.objects.create(
+            author=self.author, text='test_post', image=image)
+
+    def test_same_content_shares_file(self):
+        """Одинаковые картинки хранятся одним файлом, пока он нужен."""
+        first = self.create_post(SimpleUploadedFile('a.png', make_image()))
+        second = self.create_post(SimpleUploadedFile('b.PNG', make_image()))
+        name = first.image.name
+        self.assertTrue(is_content_name(name))
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 2)
+        first.delete()
+        self.assertTrue(self.storage.exists(name))
+        second.delete()
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_upload_holds_reference_before_collect(self):
+        """Загрузка берёт ссылку до проверки файла: сборка, которая
+        идёт после обнуления счётчика, такой файл не удаляет."""
+        post = self.create_post(SimpleUploadedFile('a.png', make_image()))
+        name = post.image.name
+        ImageBlob.objects.filter(name=name).update(refcount=0)
+        storage = Post._meta.get_field('image').storage
+        self.assertEqual(
+            storage.save('b.png', ContentFile(make_image())), name)
+        blobs._collect(name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 1)
+
+    def test_reupload_same_file_keeps_refcount(self):
+        """Повторная загрузка той же картинки в пост не добавляет
+        ссылку."""
+        post = self.create_post(SimpleUploadedFile('a.png', make_image()))
+        post.image = SimpleUploadedFile('b.png', make_image())
+        post.save()
+        self.assertEqual(
+            ImageBlob.objects.get(name=post.image.name).refcount, 1)
+
+    def test_collect_skips_reacquired_file(self):
+        """Файл не удаляется, если на него снова сослались до сборки."""
+        post = self.create_post(SimpleUploadedFile('a.png', make_image()))
+        name = post.image.name
+        with transaction.atomic():
+            blobs.release(name)
+            blobs.acquire(name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 1)
+
+    def test_dedupe_command(self):
+        """Команда переносит старые файлы в хранилище по хешу."""
+        names = [
+            self.storage.save(f'posts/{name}', ContentFile(make_image()))
+            for name in ('a.png', 'b.png')
+        ]
+        posts = [self.create_post(name) for name in names]
+        call_command('dedupe_post_images', stdout=StringIO())
+        new_names = {
+            Post.objects.get(pk=post.pk).image.name for post in posts}
+        self.assertEqual(len(new_names), 1)
+        name = new_names.pop()
+        self.assertTrue(is_content_name(name))
+        self.assertTrue(self.storage.exists(name))
+        for old_name in names:
+            self.assertFalse(self.storage.exists(old_name))
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 2)
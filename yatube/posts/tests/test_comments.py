@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.utils import COMMENTS_PER_PAGE
+
+User = get_user_model()
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.post = Post.objects.create(author=cls.author, text='test_post')
+        readers = [
+            User.objects.create_user(username=f'test_reader_{i}')
+            for i in range(5)
+        ]
+        Comment.objects.bulk_create([
+            Comment(
+                post=cls.post,
+                author=readers[i % len(readers)],
+                text=f'test_comment_{i}',
+            )
+            for i in range(COMMENTS_PER_PAGE + 5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_first_batch(self):
+        """На странице поста только первая порция комментариев."""
+        response = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}))
+        self.assertEqual(
+            len(response.context['comments']), COMMENTS_PER_PAGE)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_load_more(self):
+        """Фрагмент по курсору отдаёт остаток без повторов."""
+        detail = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}))
+        url = reverse('posts:comments', kwargs={'post_id': self.post.id})
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(
+                url, {'cursor': detail.context['next_cursor']})
+        shown = {comment.pk for comment in detail.context['comments']}
+        rest = {comment.pk for comment in response.context['comments']}
+        self.assertEqual(len(rest), 5)
+        self.assertFalse(shown & rest)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_json(self):
+        """С ?format=json порция приходит в JSON."""
+        response = self.guest_client.get(
+            reverse('posts:comments', kwargs={'post_id': self.post.id}),
+            {'format': 'json'},
+        )
+        data = response.json()
+        self.assertEqual(len(data['comments']), COMMENTS_PER_PAGE)
+        self.assertEqual(
+            set(data['comments'][0]), {'id', 'author', 'text', 'created'})
+        self.assertTrue(data['next_cursor'])
+
+    def test_missing_post(self):
+        """Для несуществующего поста фрагмент отвечает 404."""
+        response = self.guest_client.get(
+            reverse('posts:comments', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import counters
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.group_2 = Group.objects.create(
+            title='test_group_2',
+            slug='test_slug_2',
+            description='test_description_2',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def count(self, scope, pk, queryset):
+        with self.assertNumQueries(0):
+            return counters.get_count(scope, pk, queryset)
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики обновляются при создании, правке и удалении поста
+        без повторного подсчёта в базе."""
+        counters.get_count(counters.ALL, None, Post.objects.all())
+        counters.get_count(
+            counters.GROUP, self.group.id, self.group.posts.all())
+        counters.get_count(
+            counters.GROUP, self.group_2.id, self.group_2.posts.all())
+        post = Post.objects.create(
+            author=self.author, text='test_post', group=self.group)
+        self.assertEqual(self.count(counters.ALL, None, None), 1)
+        self.assertEqual(self.count(counters.GROUP, self.group.id, None), 1)
+        post.group = self.group_2
+        post.save()
+        self.assertEqual(self.count(counters.GROUP, self.group.id, None), 0)
+        self.assertEqual(
+            self.count(counters.GROUP, self.group_2.id, None), 1)
+        post.delete()
+        self.assertEqual(self.count(counters.ALL, None, None), 0)
+
+    @override_settings(FEED_COUNT_LIMIT=2)
+    def test_count_is_bounded(self):
+        """Для длинных лент считается не больше FEED_COUNT_LIMIT строк."""
+        for i in range(3):
+            Post.objects.create(author=self.author, text=f'test_post {i}')
+        cache.clear()
+        self.assertEqual(
+            counters.get_count(counters.ALL, None, Post.objects.all()), 2)
+
+    def test_reconcile_fixes_drift(self):
+        """reconcile_counters исправляет счётчики лент в кеше, которые
+        разошлись с данными."""
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f'test_post {i}', group=self.group)
+            for i in range(3)
+        ])
+        cache.set(counters.make_key(counters.ALL), 1)
+        cache.set(counters.make_key(counters.GROUP, self.group.id), 3)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.count(counters.ALL, None, None), 3)
+        self.assertEqual(self.count(counters.GROUP, self.group.id, None), 3)
+        self.assertEqual(counters.reconcile(), 0)
@@ -0,0 +1,75 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from posts.utils import PER_PAGE
+
+User = get_user_model()
+NEXT = re.compile(r'data-fragment="([^"]+)"')
+
+
+class FeedFragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(PER_PAGE * 2 + 3):
+            Post.objects.create(
+                author=cls.author, text=f'test_post_{i}', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def walk(self, url):
+        """Проходит ленту: страница, затем фрагменты по ссылкам."""
+        html = self.reader_client.get(url).content.decode()
+        found = re.findall(r'test_post_\d+', html)
+        pages = 0
+        while NEXT.search(html):
+            response = self.reader_client.get(NEXT.search(html)[1])
+            html = response.content.decode()
+            self.assertNotIn('<html', html)
+            found.extend(re.findall(r'test_post_\d+', html))
+            pages += 1
+        return found, pages
+
+    def test_fragments_cover_feed(self):
+        """Фрагменты по курсору догружают ленту без повторов."""
+        expected = [
+            f'test_post_{i}' for i in reversed(range(PER_PAGE * 2 + 3))]
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['test_slug']),
+            reverse('posts:profile', args=['test_author']),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                found, pages = self.walk(url)
+                self.assertEqual(found, expected)
+                self.assertEqual(pages, 2)
+
+    def test_profile_fragment_without_author_link(self):
+        """Во фрагменте профиля нет ссылки на тот же профиль."""
+        response = self.reader_client.get(
+            reverse('posts:profile_fragment', args=['test_author']))
+        profile_url = reverse('posts:profile', args=['test_author'])
+        self.assertNotContains(response, f'href="{profile_url}"')
+
+    def test_follow_fragment_requires_login(self):
+        """Фрагмент ленты подписок только для авторизованных."""
+        response = Client().get(reverse('posts:follow_fragment'))
+        self.assertEqual(response.status_code, 302)
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -40,6 +41,8 @@ class PostCreateFormTests(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        digest = hashlib.sha256(test_gif).hexdigest()
+        cls.image_name = f'posts/{digest[:2]}/{digest}.gif'
         cls.uploaded = SimpleUploadedFile(
             name='test.gif',
             content=test_gif,
@@ -79,7 +82,7 @@ class PostCreateFormTests(TestCase):
             Post.objects.filter(
                 group=form_data['group'],
                 text=form_data['text'],
-                image='posts/test.gif'
+                image=self.image_name
             ).exists()
         )
 
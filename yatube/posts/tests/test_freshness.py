@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(MIDDLEWARE=[
+    name for name in settings.MIDDLEWARE
+    if name != 'posts.page_cache.PageCacheMiddleware'
+])
+class ConditionalGetTests(TestCase):
+    """Условные запросы без кеша страниц, который их перехватывает."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='test_post', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_not_modified(self):
+        """Повторный запрос без изменений получает 304 за один запрос."""
+        urls = [
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:profile', kwargs={'username': 'test_author'}),
+            reverse('posts:group_list', kwargs={'slug': 'test_slug'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                self.assertEqual(first.status_code, HTTPStatus.OK)
+                self.assertIn('Last-Modified', first)
+                with self.assertNumQueries(2):
+                    second = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(
+                    second.status_code, HTTPStatus.NOT_MODIFIED)
+                third = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+                self.assertEqual(third.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_changes_invalidate(self):
+        """Комментарий, правка поста и подписка меняют ETag."""
+        detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id})
+        group = reverse('posts:group_list', kwargs={'slug': 'test_slug'})
+        profile = reverse('posts:profile', kwargs={'username': 'test_author'})
+        cases = [
+            (detail, lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='test_comment')),
+            (group, lambda: Post.objects.get(pk=self.post.pk).save()),
+            (profile, lambda: Follow.objects.create(
+                user=self.reader, author=self.author)),
+        ]
+        for url, change in cases:
+            with self.subTest(url=url):
+                etag = self.reader_client.get(url)['ETag']
+                change()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_comment_authors_and_csrf(self):
+        """Переименование автора комментария и новый CSRF-токен
+        меняют ETag поста."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='test_comment')
+        etag = self.reader_client.get(url)['ETag']
+        self.reader.first_name = 'test_name'
+        self.reader.save()
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        etag = response['ETag']
+        self.reader_client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_user_specific(self):
+        """Авторизованный пользователь не получает чужую версию
+        и не получает Last-Modified."""
+        url = reverse('posts:profile', kwargs={'username': 'test_author'})
+        etag = self.guest_client.get(url)['ETag']
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn('Last-Modified', response)
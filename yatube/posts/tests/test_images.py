@@ -0,0 +1,67 @@
+import hashlib
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class ImageMetadataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        content = BytesIO()
+        Image.new('RGB', (120, 80), (0, 0, 255)).save(content, 'PNG')
+        cls.content = content.getvalue()
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='test_post',
+            image=SimpleUploadedFile('test.png', cls.content),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def assert_metadata(self, post):
+        self.assertEqual((post.image_width, post.image_height), (120, 80))
+        self.assertEqual(post.image_format, 'PNG')
+        self.assertEqual(post.image_size, len(self.content))
+        self.assertEqual(
+            post.image_hash, hashlib.sha256(self.content).hexdigest())
+
+    def test_metadata_saved_on_upload(self):
+        """Сведения о картинке записываются при загрузке."""
+        self.assert_metadata(Post.objects.get(pk=self.post.pk))
+
+    def test_backfill_command(self):
+        """Команда заполняет сведения у старых постов."""
+        Post.objects.filter(pk=self.post.pk).update(
+            image_width=None, image_height=None, image_format='',
+            image_size=None, image_hash='')
+        call_command(
+            'backfill_image_metadata', '--chunk-size', '1', stdout=StringIO())
+        self.assert_metadata(Post.objects.get(pk=self.post.pk))
+
+    def test_img_has_stored_dimensions(self):
+        """Пока миниатюры нет, <img> получает размеры из модели."""
+        cache.clear()
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, 'width="120" height="80"')
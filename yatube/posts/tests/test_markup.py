@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.markup import EXCERPT_LENGTH
+from posts.models import Post
+
+User = get_user_model()
+
+
+class RenderedTextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_rendered_on_save(self):
+        """При сохранении поста пишутся экранированный HTML и анонс."""
+        post = Post.objects.create(
+            author=self.author, text='<b>первый</b>\n\nвторой ' * 40)
+        self.assertTrue(post.text_html.startswith('<p>&lt;b&gt;первый'))
+        self.assertIn('</p>\n\n<p>', post.text_html)
+        self.assertEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertNotIn('\n', post.excerpt)
+        post.text = 'новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>новый текст</p>')
+        self.assertEqual(post.excerpt, 'новый текст')
+
+    def test_feeds_defer_text(self):
+        """Ленты не загружают полный текст поста."""
+        Post.objects.create(author=self.author, text='test_post')
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'test_author'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                post = response.context['page_obj'][0]
+                self.assertIn('text', post.get_deferred_fields())
+                self.assertContains(response, 'test_post')
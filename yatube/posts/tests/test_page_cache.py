@@ -0,0 +1,129 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts import cache_tags, page_cache
+from posts.models import Comment, Group, Post
+from posts.page_cache import HEADER
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='test_post', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_hit_without_queries(self):
+        """Повторный анонимный запрос отдаётся из кеша без базы."""
+        url = reverse('posts:group_list', kwargs={'slug': 'test_slug'})
+        first = self.guest_client.get(url)
+        self.assertEqual(first[HEADER], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(second[HEADER], 'HIT')
+        self.assertEqual(second.content, first.content)
+        compressed = self.guest_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), first.content)
+
+    def test_key_includes_query(self):
+        """Разные query-строки кешируются отдельно."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url, {'page': 2})
+        self.assertEqual(response[HEADER], 'MISS')
+
+    def test_purged_by_signals(self):
+        """Правки поста, комментария, группы и автора сбрасывают страницы."""
+        detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id})
+        changes = [
+            lambda: Comment.objects.create(
+                post=self.post, author=self.author, text='test_comment'),
+            lambda: Group.objects.filter(pk=self.group.pk).first().save(),
+            lambda: User.objects.get(pk=self.author.pk).save(),
+            lambda: Post.objects.get(pk=self.post.pk).save(),
+        ]
+        for change in changes:
+            with self.subTest(change=change):
+                self.guest_client.get(detail)
+                change()
+                self.assertEqual(self.guest_client.get(detail)[HEADER], 'MISS')
+
+    def test_shared_between_users(self):
+        """Авторизованные читатели получают общую страницу со своими
+        персональными блоками."""
+        reader = User.objects.create_user(username='test_reader')
+        author_client = Client()
+        author_client.force_login(self.author)
+        reader_client = Client()
+        reader_client.force_login(reader)
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.id})
+        first = author_client.get(url)
+        self.assertEqual(first[HEADER], 'MISS')
+        self.assertContains(first, edit_url)
+        self.assertContains(first, 'Пользователь: test_author')
+        second = reader_client.get(url)
+        self.assertEqual(second[HEADER], 'HIT')
+        self.assertNotContains(second, edit_url)
+        self.assertContains(second, 'Пользователь: test_reader')
+        self.assertContains(second, 'csrfmiddlewaretoken')
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        guest = self.guest_client.get(url)
+        self.assertEqual(guest[HEADER], 'HIT')
+        self.assertNotContains(guest, 'csrfmiddlewaretoken')
+        self.assertNotContains(guest, '<!--personal:')
+
+    def test_revalidation_per_user(self):
+        """ETag из кеша учитывает персональные блоки пользователя."""
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('posts:profile', kwargs={'username': 'test_author'})
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_signed_in_not_modified(self):
+        """ETag авторизованного читателя не зависит от маски CSRF-токена
+        в формах: повторный запрос с If-None-Match получает 304."""
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        first = client.get(url)
+        second = client.get(url)
+        self.assertEqual(first[HEADER], 'MISS')
+        self.assertEqual(second[HEADER], 'HIT')
+        self.assertEqual(second['ETag'], first['ETag'])
+        response = client.get(url, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_versions_read_at_depend(self):
+        """В запись попадают поколения на момент объявления тегов:
+        смена тега во время отрисовки делает запись устаревшей."""
+        tag = cache_tags.make_tag(cache_tags.GROUP, self.group.pk)
+        request = RequestFactory().get('/')
+        page_cache.depend(request, [tag])
+        cache_tags.bump([tag])
+        entry = page_cache._store(request, HttpResponse('test_page'))
+        self.assertNotEqual(
+            entry['versions'], cache_tags.get_versions([tag]))
@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Post, ProfileStats
+from posts.paginators import CountingPaginator
+from posts.utils import PER_PAGE
+
+User = get_user_model()
+ELLIPSIS = CountingPaginator.ELLIPSIS
+
+
+class PageWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self, count):
+        cache.set(counters.make_key(counters.ALL), count)
+        return CountingPaginator(
+            Post.objects.all(), PER_PAGE, (counters.ALL, None))
+
+    @override_settings(FEED_COUNT_LIMIT=10 ** 6)
+    def test_window(self):
+        """Ссылки: края и по две страницы вокруг текущей."""
+        paginator = self.paginator(500000)
+        cases = {
+            1: [1, 2, 3, ELLIPSIS, 50000],
+            4: [1, 2, 3, 4, 5, 6, ELLIPSIS, 50000],
+            100: [1, ELLIPSIS, 98, 99, 100, 101, 102, ELLIPSIS, 50000],
+            50000: [1, ELLIPSIS, 49998, 49999, 50000],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    paginator.get_page_window(number), expected)
+        self.assertEqual(
+            self.paginator(50).get_page_window(3), [1, 2, 3, 4, 5])
+
+    def test_approximate_count(self):
+        """При оценке числа постов последняя страница не выводится."""
+        paginator = self.paginator(500000)
+        self.assertFalse(paginator.count_is_exact)
+        self.assertEqual(paginator.get_page_window(1), [1, 2, 3, ELLIPSIS])
+
+    def test_feed_links(self):
+        """Лента выводит окно ссылок, а не весь page_range."""
+        author = User.objects.create_user(username='test_author')
+        Post.objects.create(author=author, text='test_post')
+        self.paginator(500000)
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'href="?page=3"')
+        self.assertNotContains(response, 'href="?page=4"')
+        self.assertNotContains(response, 'Последняя')
+
+
+class CountLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        Post.objects.bulk_create([
+            Post(author=cls.author, text=f'test_post {i}')
+            for i in range(PER_PAGE * 2 + 5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(FEED_COUNT_LIMIT=PER_PAGE * 2)
+    def test_page_past_estimate(self):
+        """Номер дальше оценки даёт последнюю оценённую страницу,
+        а более старые посты доступны по курсору."""
+        response = Client().get(reverse('posts:index') + '?page=99')
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.number, 2)
+        self.assertIsNotNone(page_obj.next_cursor)
+        self.assertContains(response, 'Следующая')
+        response = Client().get(
+            reverse('posts:index') + f'?cursor={page_obj.next_cursor}')
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 5)
+        self.assertIsNone(page_obj.next_cursor)
+        self.assertNotContains(response, 'Следующая')
+
+    def test_stale_counter_reaches_end(self):
+        """Отставший счётчик не обрывает ленту: у полной последней
+        страницы есть курсор на следующую."""
+        cache.set(counters.make_key(counters.ALL), 12)
+        response = Client().get(reverse('posts:index') + '?page=2')
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), PER_PAGE)
+        self.assertIsNotNone(page_obj.next_cursor)
+        response = Client().get(
+            reverse('posts:index') + f'?cursor={page_obj.next_cursor}')
+        self.assertEqual(len(response.context['page_obj']), 5)
+        self.assertIsNone(response.context['page_obj'].next_cursor)
+
+    @override_settings(FEED_COUNT_LIMIT=PER_PAGE)
+    def test_known_count_is_exact(self):
+        """Переданное число постов точное при любом FEED_COUNT_LIMIT."""
+        paginator = CountingPaginator(
+            Post.objects.all(), PER_PAGE, count=PER_PAGE * 2 + 5)
+        self.assertTrue(paginator.count_is_exact)
+
+    def test_profile_counts_from_stats(self):
+        """Профиль берёт число постов из ProfileStats, а не из
+        отдельного счётчика."""
+        ProfileStats.objects.filter(user=self.author).update(
+            posts_count=PER_PAGE * 3)
+        for name in ('posts:profile', 'posts:profile_fragment'):
+            with self.subTest(name=name):
+                response = Client().get(reverse(name, args=['test_author']))
+                paginator = response.context['page_obj'].paginator
+                self.assertEqual(paginator.count, PER_PAGE * 3)
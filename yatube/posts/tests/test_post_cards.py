@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import cache_tags
+from posts.models import Group, Post
+
+User = get_user_model()
+
+PAGE = Template(
+    '{% load post_cards %}'
+    '{% for post in page_obj %}{% post_card post %}{% endfor %}'
+)
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test.author+1@x')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='test_post', group=cls.group)
+        cls.other = Post.objects.create(author=cls.author, text='test_other')
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self):
+        return PAGE.render(Context({'page_obj': list(Post.objects.all())}))
+
+    def test_prebuilt_urls(self):
+        """Ссылки карточек совпадают с reverse()."""
+        html = self.render()
+        for url in (
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:group_list', args=[self.group.slug]),
+        ):
+            with self.subTest(url=url):
+                self.assertIn(f'href="{url}"', html)
+
+    def test_only_changed_card_rendered(self):
+        """Смена поколения поста перерисовывает только его карточку."""
+        self.render()
+        Post.objects.filter(pk__in=[self.post.pk, self.other.pk]).update(
+            excerpt='changed')
+        cache_tags.bump([cache_tags.make_tag(cache_tags.POST, self.post.pk)])
+        html = self.render()
+        self.assertEqual(html.count('changed'), 1)
+        self.assertIn('test_other', html)
@@ -0,0 +1,116 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.views import PER_PAGE
+
+User = get_user_model()
+
+# «SCAN t» в SQLite от 3.36 и «SCAN TABLE t» в более старых
+SCAN = re.compile(
+    r'^SCAN (TABLE )?(?P<table>\w+)'
+    r'(?: USING (COVERING )?INDEX (?P<index>\w+))?'
+)
+# Проход по результату подзапроса или константе, а не по таблице
+DERIVED = {'subquery', 'constant'}
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTests(TestCase):
+    """Запросы страниц не должны сканировать таблицы целиком
+    и сортировать во временном B-дереве."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.follower = User.objects.create_user(username='test_follower')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description',
+        )
+        for i in range(PER_PAGE + 1):
+            cls.post = Post.objects.create(
+                author=cls.author, text=f'test_post {i}', group=cls.group)
+        Comment.objects.create(
+            post=cls.post, author=cls.follower, text='test_comment')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_indexed(self, url, data=None, scan_index=None):
+        """Таблицы читаются поиском по индексу (SEARCH). Проход
+        таблицы (SCAN) допустим только по scan_index: ленту без фильтра
+        читают по нему в порядке сортировки до LIMIT."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        for query in queries.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            for step in self.plan(query['sql']):
+                with self.subTest(url=url, sql=query['sql'], step=step):
+                    self.assertNotIn(TEMP_SORT, step)
+                    scan = SCAN.match(step)
+                    if scan and scan['table'].lower() not in DERIVED:
+                        self.assertIsNotNone(scan['index'])
+                        self.assertEqual(scan['index'], scan_index)
+        return response
+
+    def test_scan_pattern(self):
+        """Проход таблицы распознаётся в записи старых и новых SQLite."""
+        steps = {
+            'SCAN posts_post': None,
+            'SCAN TABLE posts_post': None,
+            'SCAN posts_post USING INDEX post_pub_date_idx':
+                'post_pub_date_idx',
+            'SCAN TABLE posts_post USING COVERING INDEX post_pub_date_idx':
+                'post_pub_date_idx',
+        }
+        for step, index in steps.items():
+            with self.subTest(step=step):
+                scan = SCAN.match(step)
+                self.assertEqual(scan['table'], 'posts_post')
+                self.assertEqual(scan['index'], index)
+        self.assertIsNone(SCAN.match(
+            'SEARCH posts_post USING INDEX post_author_pub_date_idx '
+            '(author_id=?)'))
+
+    def test_feed_queries_use_indexes(self):
+        """Ленты, их курсорные страницы и комментарии идут по индексам."""
+        urls = {
+            reverse('posts:index'): 'post_pub_date_idx',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}):
+                None,
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username}):
+                None,
+            reverse('posts:follow_index'): None,
+        }
+        for url, scan_index in urls.items():
+            page = self.assert_indexed(
+                url, scan_index=scan_index).context['page_obj']
+            next_page = self.assert_indexed(
+                url, {'cursor': page.next_cursor},
+                scan_index=scan_index).context['page_obj']
+            self.assert_indexed(
+                url, {'cursor': next_page.previous_cursor},
+                scan_index=scan_index)
+        self.assert_indexed(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from posts.read_models import PostRow, post_rows
+from posts.utils import PER_PAGE
+
+User = get_user_model()
+
+
+class ReadModelTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='test_author', first_name='Имя', last_name='Фамилия')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description',
+        )
+        for i in range(PER_PAGE + 2):
+            Post.objects.create(
+                author=cls.author,
+                text=f'test_post_{i}',
+                group=cls.group if i % 2 else None,
+                image='posts/test.jpg' if i == 0 else '',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_single_query(self):
+        """Строки ленты с автором и группой читаются одним запросом."""
+        with self.assertNumQueries(1):
+            rows = list(post_rows(Post.objects.all()))
+            for row in rows:
+                row.author.get_full_name()
+                row.group and row.group.slug
+        self.assertEqual(rows[0].author.get_full_name(), 'Имя Фамилия')
+        self.assertEqual(rows[-1].image.name, 'posts/test.jpg')
+        self.assertFalse(rows[0].image)
+
+    def test_same_html(self):
+        """Ленты на строках выглядят так же, как на моделях."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test_slug'}),
+            reverse('posts:profile', kwargs={'username': 'test_author'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                expected = self.guest_client.get(url)
+                cache.clear()
+                with override_settings(POST_FEED_READ_MODELS=True):
+                    response = self.guest_client.get(url)
+                    page = response.context['page_obj']
+                    self.assertIsInstance(page[0], PostRow)
+                    if page.next_cursor:
+                        next_page = self.guest_client.get(
+                            url, {'cursor': page.next_cursor})
+                        self.assertEqual(next_page.status_code, 200)
+                cache.clear()
+                self.assertEqual(response.content, expected.content)
+
+    def test_follow_feed_rows(self):
+        """Лента подписок на строках выводит те же посты в том же
+        порядке, что и на моделях."""
+        reader = User.objects.create_user(username='test_reader')
+        Follow.objects.create(user=reader, author=self.author)
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:follow_index')
+        expected = client.get(url).context['page_obj']
+        cache.clear()
+        with override_settings(POST_FEED_READ_MODELS=True):
+            page = client.get(url).context['page_obj']
+            self.assertIsInstance(page[0], PostRow)
+            next_page = client.get(url, {'cursor': page.next_cursor})
+        self.assertEqual(
+            [post.pk for post in page], [post.pk for post in expected])
+        self.assertEqual(
+            [post.pk for post in next_page.context['page_obj']],
+            list(Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)[PER_PAGE:]),
+        )
+
+    def test_benchmark(self):
+        """Бенчмарк сравнивает три варианта и откатывает свои данные."""
+        out = StringIO()
+        call_command(
+            'benchmark_feed_rows', posts=30, authors=3, groups=2, pages=2,
+            stdout=out,
+        )
+        self.assertIn('PostRow: медиана', out.getvalue())
+        self.assertEqual(Post.objects.count(), PER_PAGE + 2)
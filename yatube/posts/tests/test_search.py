@@ -0,0 +1,61 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 есть только в SQLite')
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Сегодня <b>солнечная</b> погода')
+        Post.objects.create(author=cls.author, text='Идёт дождь')
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query):
+        return self.client.get(reverse('posts:search'), {'q': query})
+
+    def test_search_ranks_and_highlights(self):
+        """Поиск находит пост по слову и подсвечивает совпадение,
+        экранируя текст поста."""
+        response = self.search('солнечн')
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), [self.post])
+        self.assertIn('<mark>солнечная</mark>', page_obj[0].snippet)
+        self.assertIn('&lt;b&gt;', page_obj[0].snippet)
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Пасмурно'
+        post.save()
+        self.assertEqual(len(self.search('солнечная').context['page_obj']), 0)
+        self.assertEqual(len(self.search('пасмурно').context['page_obj']), 1)
+        post.delete()
+        self.assertEqual(len(self.search('пасмурно').context['page_obj']), 0)
+
+    def test_query_syntax_is_escaped(self):
+        """Операторы FTS5 во вводе пользователя не ломают поиск."""
+        response = self.search('"дождь OR (NEAR')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через полнотекстовый индекс."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'дождь'})
+        self.assertEqual(response.context['cl'].result_count, 1)
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import stats
+from posts.models import Comment, Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class SeedDatasetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command(
+            'seed_dataset', users=30, groups=3, posts=200, follows=3,
+            comments=300, stdout=StringIO(),
+        )
+
+    def test_volumes(self):
+        """Создаётся заказанное число записей."""
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+
+    def test_counters_consistent(self):
+        """Счётчики, заполненные при посеве, совпадают с данными."""
+        self.assertEqual(stats.reconcile(), 0)
+
+    def test_dates_follow_ids(self):
+        """Даты постов растут вместе с id."""
+        dates = list(
+            Post.objects.order_by('pk').values_list('pub_date', flat=True))
+        self.assertEqual(dates, sorted(dates))
+
+    def test_dates_kept_without_auto_now_add_switch(self):
+        """Заданные даты сохраняются, а auto_now_add моделей
+        по-прежнему ставит текущее время."""
+        self.assertLess(
+            Post.objects.earliest('pub_date').pub_date,
+            timezone.now() - timedelta(days=300))
+        self.assertLess(
+            Comment.objects.earliest('created').created,
+            timezone.now() - timedelta(days=300))
+        for model, name in ((Post, 'pub_date'), (Comment, 'created')):
+            with self.subTest(model=model):
+                self.assertTrue(model._meta.get_field(name).auto_now_add)
+        post = Post.objects.create(
+            author=User.objects.first(), text='test_post')
+        self.assertGreater(
+            post.pub_date, timezone.now() - timedelta(minutes=1))
+
+    def test_timeline_limit_warns(self):
+        """Если ленты собраны не всем подписчикам, команда об этом
+        предупреждает."""
+        stderr = StringIO()
+        call_command(
+            'seed_dataset', users=10, posts=20, follows=3, comments=0,
+            timeline_users=1, prefix='seed_limited_', stdout=StringIO(),
+            stderr=stderr,
+        )
+        self.assertIn('Ленты собраны для 1 из', stderr.getvalue())
+
+    def test_timelines(self):
+        """Ленты подписчиков собраны из постов их авторов."""
+        follow = Follow.objects.first()
+        expected = set(
+            Post.objects
+            .filter(author__following__user_id=follow.user_id)
+            .values_list('pk', flat=True)
+        )
+        actual = set(
+            TimelineEntry.objects
+            .filter(user_id=follow.user_id)
+            .values_list('post_id', flat=True)
+        )
+        self.assertEqual(actual, expected)
+
+    def test_benchmark_views(self):
+        """Замеры по страницам сохраняются в JSON."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'result.json')
+            call_command(
+                'benchmark_views', requests=2, warmup=0, output=output,
+                stdout=StringIO(),
+            )
+            with open(output, encoding='utf-8') as file:
+                report = json.load(file)
+        self.assertEqual(report['scale']['posts'], 200)
+        self.assertEqual(
+            set(report['views']),
+            {'index', 'group_list', 'profile', 'post_detail', 'follow_index'},
+        )
+        for result in report['views'].values():
+            self.assertGreater(result['bytes']['p50'], 0)
+            self.assertIn('p99', result['latency_ms'])
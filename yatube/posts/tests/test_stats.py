@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, ProfileStats
+
+User = get_user_model()
+
+
+class ProfileStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.follower = User.objects.create_user(username='test_follower')
+
+    def stats(self, user):
+        return ProfileStats.objects.get(user=user)
+
+    def test_counters_follow_changes(self):
+        """Счётчики постов, комментариев и подписок
+        обновляются при записи."""
+        post = Post.objects.create(author=self.author, text='test_post')
+        comment = Comment.objects.create(
+            post=post, author=self.follower, text='test_comment')
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.follower).following_count, 1)
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.follower).following_count, 0)
+
+    def test_decrement_at_zero(self):
+        """Отписка и удаление при обнулённых счётчиках не уводят их
+        ниже нуля и не ломают запрос."""
+        post = Post.objects.create(author=self.author, text='test_post')
+        comment = Comment.objects.create(
+            post=post, author=self.follower, text='test_comment')
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        ProfileStats.objects.update(
+            posts_count=0, followers_count=0, following_count=0)
+        Post.objects.filter(pk=post.pk).update(comments_count=0)
+        comment.delete()
+        follow.delete()
+        post.delete()
+        stats = self.stats(self.author)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(self.stats(self.follower).following_count, 0)
+
+    def test_reconcile_fixes_drift(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        post = Post.objects.create(author=self.author, text='test_post')
+        Comment.objects.create(
+            post=post, author=self.follower, text='test_comment')
+        ProfileStats.objects.filter(user=self.author).update(posts_count=7)
+        ProfileStats.objects.filter(user=self.follower).delete()
+        Post.objects.filter(pk=post.pk).update(comments_count=0)
+        call_command('reconcile_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.follower).posts_count, 0)
@@ -0,0 +1,126 @@
+import shutil
+import tempfile
+import json
+import os
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default
+
+from posts import cache_tags, thumbnails
+from posts.models import Post
+from posts.templatetags.post_images import post_picture
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        content = BytesIO()
+        Image.new('RGB', (100, 50), (255, 0, 0)).save(content, 'JPEG')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                text=f'test_post {i}',
+                image=SimpleUploadedFile(f'test{i}.jpg', content.getvalue()),
+            )
+            for i in range(3)
+        ]
+        cls.post = cls.posts[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        thumbnails.recent.clear()
+        shutil.rmtree(
+            os.path.join(TEMP_MEDIA_ROOT, 'cache'), ignore_errors=True)
+
+    def picture(self):
+        return post_picture(Context(), self.post)
+
+    def test_original_until_variants_ready(self):
+        """Пока вариантов нет, выводится исходная картинка,
+        а после генерации — JPEG-варианты всех ширин в srcset."""
+        picture = self.picture()
+        self.assertEqual(picture['image'].name, self.post.image.name)
+        self.assertEqual(picture['srcset'], '')
+        thumbnails.submit(self.post.pk, self.post.image.name)
+        picture = self.picture()
+        self.assertEqual(
+            (picture['image'].width, picture['image'].height), (960, 339))
+        self.assertEqual(picture['srcset'].count('w, '), 2)
+        self.assertEqual(
+            len(picture['sources']), len(thumbnails.image_formats()) - 1)
+        self.assertEqual(
+            thumbnails.get_jobs(self.post.image.name, thumbnails.variants()),
+            [],
+        )
+
+    def test_page_variants_in_one_query(self):
+        """Варианты страницы ищутся одним запросом, повторно — из памяти."""
+        images = [post.image for post in self.posts]
+        for image in images:
+            thumbnails.submit(None, image.name)
+        items = [
+            (image, geometry, options)
+            for image in images
+            for geometry, options in thumbnails.variants()
+        ]
+        default.backend.find_ready(items)
+        cache.clear()
+        thumbnails.recent.clear()
+        with self.assertNumQueries(1):
+            found = default.backend.find_ready(items)
+        self.assertTrue(all(found))
+        with self.assertNumQueries(0):
+            cache.clear()
+            default.backend.find_ready(items)
+
+    def test_backfill_command(self):
+        """Оценка ничего не пишет, а проход создаёт все варианты,
+        записывает их в KV-хранилище, сбрасывает карточки постов
+        с картинкой и сохраняет прогресс."""
+        state = os.path.join(TEMP_MEDIA_ROOT, 'state.json')
+        images = [post.image for post in self.posts]
+        out = StringIO()
+        call_command(
+            'backfill_thumbnails', '--workers', '0', '--dry-run',
+            '--state', state, stdout=out)
+        self.assertIn('Картинок: 1', out.getvalue())
+        self.assertFalse(any(
+            default.backend.get_ready_thumbnails(images, '960x339')))
+        tags = [
+            cache_tags.make_tag(cache_tags.POST, post.pk)
+            for post in self.posts
+        ]
+        versions = cache_tags.get_versions(tags)
+        call_command(
+            'backfill_thumbnails', '--workers', '0', '--state', state,
+            stdout=StringIO())
+        for geometry, options in thumbnails.variants():
+            _, thumbnail, _ = default.backend.get_thumbnail_file(
+                self.post.image, geometry, **options)
+            self.assertIsNotNone(default.kvstore.get(thumbnail))
+        new_versions = cache_tags.get_versions(tags)
+        for tag in tags:
+            self.assertNotEqual(new_versions[tag], versions[tag])
+        with open(state) as state_file:
+            self.assertEqual(
+                json.load(state_file)['last_pk'], self.posts[-1].pk)
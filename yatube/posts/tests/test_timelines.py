@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import timelines
+from posts.models import Follow, Post, TimelineEntry
+from posts.views import PER_PAGE
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.follower = User.objects.create_user(username='test_follower')
+
+    def timeline(self):
+        return list(
+            TimelineEntry.objects
+            .filter(user=self.follower)
+            .values_list('post__text', flat=True)
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост автора попадает в ленты его подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Post.objects.create(author=self.author, text='test_post')
+        self.assertEqual(self.timeline(), ['test_post'])
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        """Подписка добавляет старые посты автора, отписка их убирает."""
+        Post.objects.create(author=self.author, text='test_post')
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.timeline(), ['test_post'])
+        follow.delete()
+        self.assertEqual(self.timeline(), [])
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_timeline_is_trimmed(self):
+        """В ленте хранится не больше TIMELINE_LENGTH записей."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        for i in range(4):
+            Post.objects.create(author=self.author, text=f'test_post {i}')
+        self.assertEqual(len(self.timeline()), 2)
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_trim_keeps_ties(self):
+        """Посты с одинаковой датой на границе не срезаются сверх лимита;
+        ленты всех пользователей обрезаются одним запросом."""
+        readers = [
+            User.objects.create_user(username=f'test_reader_{i}')
+            for i in range(3)
+        ]
+        posts = [
+            Post.objects.create(author=self.author, text=f'test_post {i}')
+            for i in range(3)
+        ]
+        TimelineEntry.objects.bulk_create([
+            TimelineEntry(user=reader, post=post, pub_date=posts[0].pub_date)
+            for reader in readers
+            for post in posts
+        ])
+        with self.assertNumQueries(1):
+            timelines._trim([reader.pk for reader in readers])
+        for reader in readers:
+            self.assertEqual(
+                list(TimelineEntry.objects.filter(user=reader).values_list(
+                    'post__text', flat=True)),
+                ['test_post 2', 'test_post 1'],
+            )
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timelines восстанавливает ленты."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Post.objects.create(author=self.author, text='test_post')
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.timeline(), ['test_post'])
+
+    def test_follow_index_cursor(self):
+        """Лента подписок листается курсором."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        for i in range(PER_PAGE + 2):
+            Post.objects.create(author=self.author, text=f'test_post {i}')
+        client = Client()
+        client.force_login(self.follower)
+        url = reverse('posts:follow_index')
+        first_page = client.get(url).context['page_obj']
+        next_page = client.get(
+            url, {'cursor': first_page.next_cursor}).context['page_obj']
+        self.assertEqual(
+            [post.text for post in next_page], ['test_post 1', 'test_post 0'])
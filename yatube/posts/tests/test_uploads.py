@@ -0,0 +1,89 @@
+import hashlib
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size, format_):
+    content = BytesIO()
+    Image.new('RGB', size, (0, 128, 0)).save(content, format_)
+    return content.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def upload(self, name, content, client=None):
+        return (client or self.client).post(reverse('posts:create_post'), {
+            'text': 'test_post',
+            'image': SimpleUploadedFile(name, content),
+        })
+
+    def test_hash_computed_while_streaming(self):
+        """Картинка сохраняется с хешем, посчитанным при загрузке."""
+        content = make_image((40, 20), 'PNG')
+        self.upload('test.png', content)
+        post = Post.objects.get()
+        self.assertEqual(
+            post.image_hash, hashlib.sha256(content).hexdigest())
+        self.assertEqual((post.image_width, post.image_height), (40, 20))
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_too_large_file_rejected(self):
+        """Файл больше лимита отклоняется формой."""
+        response = self.upload('test.png', make_image((200, 200), 'PNG'))
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 0 МБ.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected(self):
+        """Картинка больше лимита пикселей отклоняется по заголовку."""
+        response = self.upload('test.png', make_image((20, 20), 'PNG'))
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка больше 0 мегапикселей.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_SIDE=64)
+    def test_large_jpeg_downscaled(self):
+        """Слишком большой JPEG уменьшается при загрузке."""
+        self.upload('test.jpg', make_image((512, 256), 'JPEG'))
+        post = Post.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (64, 32))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (64, 32))
+
+    def test_csrf_still_checked(self):
+        """Без CSRF-токена загрузка запрещена."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.author)
+        response = self.upload(
+            'test.png', make_image((4, 4), 'PNG'), client=client)
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.exists())
@@ -6,6 +6,7 @@ from django.test import Client, TestCase
 from django.urls import reverse
 
 from posts.models import Group, Post
+from posts.views import PER_PAGE
 
 User = get_user_model()
 
@@ -29,6 +30,7 @@ class PostURLTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='test_user')
         self.authorized_client = Client()
@@ -107,6 +109,7 @@ class CachePageTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -114,7 +117,8 @@ class CachePageTests(TestCase):
         """Проверка кеширования главной страницы."""
         response = self.authorized_client.get(
             reverse('posts:index')).content
-        self.post_cache.delete()
+        Post.objects.filter(pk=self.post_cache.pk).update(
+            text='changed', excerpt='changed')
         response_cache = self.authorized_client.get(
             reverse('posts:index')).content
         self.assertEqual(response, response_cache)
@@ -122,3 +126,22 @@ class CachePageTests(TestCase):
         response_clear = self.authorized_client.get(
             reverse('posts:index')).content
         self.assertNotEqual(response, response_clear)
+
+    def test_cache_page_invalidated_on_delete(self):
+        """Удаление поста сбрасывает кеш главной страницы."""
+        response = self.authorized_client.get(
+            reverse('posts:index')).content
+        self.post_cache.delete()
+        response_deleted = self.authorized_client.get(
+            reverse('posts:index')).content
+        self.assertNotEqual(response, response_deleted)
+
+    def test_cache_page_per_page_number(self):
+        """Разные страницы ленты кешируются отдельно."""
+        for i in range(PER_PAGE):
+            Post.objects.create(author=self.user, text=f'test_post {i}')
+        first_page = self.authorized_client.get(reverse('posts:index'))
+        second_page = self.authorized_client.get(
+            reverse('posts:index'), {'page': 2})
+        self.assertNotIn(b'test_cache', first_page.content)
+        self.assertIn(b'test_cache', second_page.content)
@@ -1,4 +1,8 @@
+import base64
+import json
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -35,6 +39,7 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -134,6 +139,8 @@ class PostPagesTests(TestCase):
                 self.assertEqual(page_field, context)
 
         """Страница показывает комментарии к посту."""
+        # Повторный анонимный запрос отдал бы кеш страниц без контекста.
+        cache.clear()
         response = self.client.get(reverse(
             'posts:post_detail',
             kwargs={'post_id': self.post.id}
@@ -198,6 +205,7 @@ class PaginatorTest(TestCase):
             )
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -231,6 +239,51 @@ class PaginatorTest(TestCase):
                 response = self.authorized_client.get(url, {'page': page})
                 self.assertEqual(len(response.context['page_obj']), pages)
 
+    def test_cursor_pages_walk_whole_feed(self):
+        """Переход по курсорам выдаёт все посты без повторов
+        и возвращает на предыдущую страницу."""
+        url = reverse('posts:index')
+        first_page = self.authorized_client.get(url).context['page_obj']
+        next_page = self.authorized_client.get(
+            url, {'cursor': first_page.next_cursor}).context['page_obj']
+        self.assertEqual(next_page.number, 2)
+        self.assertEqual(len(next_page), TEST_POSTS_COUNT - PER_PAGE)
+        self.assertIsNone(next_page.next_cursor)
+        texts = [post.text for post in [*first_page, *next_page]]
+        self.assertEqual(len(set(texts)), TEST_POSTS_COUNT)
+        previous_page = self.authorized_client.get(
+            url, {'cursor': next_page.previous_cursor}).context['page_obj']
+        self.assertEqual(previous_page.number, 1)
+        self.assertEqual(list(previous_page), list(first_page))
+
+    def test_invalid_cursor_falls_back_to_page(self):
+        """Некорректный курсор не ломает страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'broken', 'page': 2})
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+    def test_tampered_cursor_falls_back_to_page(self):
+        """Курсор с подменёнными значениями ключа не доходит до запроса:
+        лента, фрагмент и API отвечают как без курсора."""
+        cursors = [
+            ['n', 1, '2020', 'x'],
+            ['n', 1, '2020-01-01T00:00:00+00:00', [1]],
+            ['p', 1, None, 1],
+        ]
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:index_fragment'),
+            reverse('api_v1:posts'),
+        ]
+        for values in cursors:
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(values).encode()).decode()
+            for url in urls:
+                with self.subTest(url=url, cursor=values):
+                    response = self.authorized_client.get(
+                        url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+
 
 class FollowTest(TestCase):
     @classmethod
@@ -0,0 +1,478 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from . import cache_tags
+from .storage import ContentAddressedStorage
+
+logger = logging.getLogger(__name__)
+
+# sorl не знает расширения AVIF, хотя Pillow с плагином его сохраняет.
+EXTENSIONS.setdefault('AVIF', 'avif')
+
+_executor = None
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который умеет искать миниатюру, не создавая её."""
+
+    def get_thumbnail_file(self, file_, geometry_string, **options):
+        """Повторяет вычисление имени и опций миниатюры из get_thumbnail.
+
+        Размеры картинки поста берутся из модели, а не из файла.
+        """
+        source = ImageFile(file_)
+        source.set_size(stored_size(file_))
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return source, ImageFile(name, default.storage), options
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """Возвращает миниатюру, если она уже создана, иначе None."""
+        return self.get_ready_thumbnails(
+            [file_], geometry_string, **options)[0]
+
+    def get_ready_thumbnails(self, files, geometry_string, **options):
+        """Ищет готовые миниатюры одного размера для списка картинок."""
+        return self.find_ready(
+            [(file_, geometry_string, options) for file_ in files])
+
+    def find_ready(self, items):
+        """Ищет готовые миниатюры для пар (картинка, размер, опции) разом.
+
+        Сначала смотрит в LRU процесса, затем одним get_many в кеш
+        и одним запросом в таблицу KV-хранилища. Файл, который создал
+        фоновый процесс, регистрируется в KV-хранилище при первом
+        обращении.
+        """
+        pairs = [
+            self.get_thumbnail_file(file_, geometry_string, **options)[:2]
+            for file_, geometry_string, options in items
+        ]
+        found = _lookup([thumbnail.key for _, thumbnail in pairs])
+        result = []
+        for source, thumbnail in pairs:
+            cached = found.get(thumbnail.key)
+            if cached is None and thumbnail.exists():
+                default.kvstore.get_or_set(source)
+                default.kvstore.set(thumbnail, source)
+                cached = thumbnail
+                recent.set(thumbnail.key, thumbnail)
+            result.append(cached)
+        return result
+
+
+class LRU:
+    """Потокобезопасный LRU-словарь фиксированного размера."""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+# Метаданные готовых миниатюр не меняются: имя файла зависит от
+# исходника и опций, поэтому их можно держать в памяти процесса.
+# Отсутствие миниатюры не запоминается — её может создать пул.
+recent = LRU(settings.POST_THUMBNAIL_LRU_SIZE)
+
+
+def _lookup(keys):
+    """Находит записи KV-хранилища sorl по ключам миниатюр."""
+    # Модуль импортируют процессы пула до django.setup(),
+    # поэтому модели sorl загружаются только здесь.
+    from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+    from sorl.thumbnail.models import KVStore
+
+    found = {}
+    missing = []
+    for key in keys:
+        cached = recent.get(key)
+        if cached is not None:
+            found[key] = cached
+        elif key not in missing:
+            missing.append(key)
+    if not missing:
+        return found
+    raw_keys = {add_prefix(key): key for key in missing}
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(raw_keys)
+    absent = [raw_key for raw_key in raw_keys if raw_key not in values]
+    if absent:
+        rows = dict(
+            KVStore.objects.filter(key__in=absent).values_list('key', 'value'))
+        for raw_key in absent:
+            values[raw_key] = rows.get(raw_key, EMPTY_VALUE)
+        kv_cache.set_many(
+            {raw_key: values[raw_key] for raw_key in absent},
+            thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+    for raw_key, value in values.items():
+        if value == EMPTY_VALUE or not value:
+            continue
+        thumbnail = deserialize_image_file(value)
+        found[raw_keys[raw_key]] = thumbnail
+        recent.set(raw_keys[raw_key], thumbnail)
+    return found
+
+
+def image_formats():
+    """Форматы из POST_IMAGE_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [
+        format_ for format_ in settings.POST_IMAGE_FORMATS
+        if format_ in Image.SAVE
+    ]
+
+
+def variants():
+    """Размеры и форматы, в которых хранится каждая картинка поста.
+
+    Все варианты — кадрирование по центру с пропорциями
+    POST_IMAGE_SIZE на ширинах из POST_IMAGE_WIDTHS.
+    """
+    width, height = settings.POST_IMAGE_SIZE
+    return [
+        (
+            f'{variant_width}x{round(variant_width * height / width)}',
+            {'crop': 'center', 'upscale': True, 'format': format_},
+        )
+        for format_ in image_formats()
+        for variant_width in settings.POST_IMAGE_WIDTHS
+    ]
+
+
+def stored_size(file_):
+    """Размеры картинки, сохранённые в посте при загрузке, или None."""
+    post = getattr(file_, 'instance', None)
+    width = getattr(post, 'image_width', None)
+    height = getattr(post, 'image_height', None)
+    if width and height:
+        return width, height
+    return None
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.POST_THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+class _Measured:
+    """Заменяет файл миниатюры при оценке: считает байты, не записывая."""
+
+    def __init__(self, name):
+        self.name = name
+        self.bytes = 0
+        self.size = None
+
+    def exists(self):
+        return False
+
+    def write(self, content):
+        self.bytes = len(content)
+
+    def set_size(self, size):
+        self.size = size
+
+
+def render(location, name, jobs, size=None, dry_run=False):
+    """Создаёт файлы миниатюр; выполняется в процессе пула.
+
+    Работает только с файлами, без базы данных и KV-хранилища.
+    Возвращает размеры исходника и список (имя, размеры, байты)
+    по миниатюрам; при dry_run файлы не записываются.
+    """
+    storage = FileSystemStorage(location=location)
+    source = ImageFile(name, storage)
+    source_image = default.engine.get_image(source)
+    results = []
+    try:
+        source.set_size(size or default.engine.get_image_size(source_image))
+        for thumbnail_name, geometry, options in jobs:
+            if dry_run:
+                thumbnail = _Measured(thumbnail_name)
+            else:
+                thumbnail = ImageFile(thumbnail_name, storage)
+            if thumbnail.exists():
+                results.append((thumbnail_name, None, 0))
+                continue
+            options['image_info'] = default.engine.get_image_info(
+                source_image)
+            default.backend._create_thumbnail(
+                source_image, geometry, options, thumbnail)
+            written = thumbnail.bytes if dry_run else storage.size(
+                thumbnail_name)
+            results.append((thumbnail_name, thumbnail.size, written))
+    finally:
+        default.engine.cleanup(source_image)
+    return source.size, results
+
+
+def render_task(task):
+    """Обёртка render для Pool.imap_unordered: ошибки возвращаются,
+    а не обрывают весь проход."""
+    name = task[1]
+    try:
+        return name, render(*task), None
+    except Exception as error:
+        return name, None, repr(error)
+
+
+def register(name, size, results):
+    """Записывает готовые миниатюры в KV-хранилище sorl."""
+    source = ImageFile(name, ContentAddressedStorage())
+    source.set_size(size)
+    default.kvstore.get_or_set(source)
+    for thumbnail_name, thumbnail_size, _ in results:
+        thumbnail = ImageFile(thumbnail_name, default.storage)
+        thumbnail.set_size(thumbnail_size)
+        default.kvstore.set(thumbnail, source)
+
+
+def get_jobs(name, geometries):
+    # Имя миниатюры зависит от хранилища исходника, поэтому оно
+    # должно совпадать с хранилищем поля Post.image.
+    source = ImageFile(name, ContentAddressedStorage())
+    jobs = []
+    for geometry, options in geometries:
+        _, thumbnail, options = default.backend.get_thumbnail_file(
+            source, geometry, **options)
+        if not default.kvstore.get(thumbnail):
+            jobs.append((thumbnail.name, geometry, options))
+    return jobs
+
+
+def _done(post_id, name, future):
+    error = future.exception()
+    if error is not None:
+        logger.error(
+            'Не удалось создать миниатюры для %s', name, exc_info=error)
+        return
+    cache_tags.bump([cache_tags.make_tag(cache_tags.POST, post_id)])
+
+
+def submit(post_id, name, size=None):
+    jobs = get_jobs(name, variants())
+    if not jobs:
+        return
+    if not settings.POST_THUMBNAIL_WORKERS:
+        render(settings.MEDIA_ROOT, name, jobs, size)
+        return
+    global _executor
+    try:
+        future = _get_executor().submit(
+            render, settings.MEDIA_ROOT, name, jobs, size)
+    except BrokenProcessPool:
+        # Миниатюры создадутся при следующей записи или командой
+        # пересоздания, а следующий пост получит новый пул.
+        logger.exception('Пул миниатюр сломан, %s пропущен', name)
+        _executor = None
+        return
+    future.add_done_callback(lambda future: _done(post_id, name, future))
+
+
+def schedule(post):
+    """Ставит создание миниатюр поста в пул процессов после коммита.
+
+    При POST_THUMBNAIL_WORKERS = 0 миниатюры создаются сразу.
+    """
+    if post.image:
+        name = post.image.name
+        size = stored_size(post.image)
+        transaction.on_commit(lambda: submit(post.pk, name, size))
+
+
+def _signature():
+    return hashlib.md5(repr(variants()).encode()).hexdigest()
+
+
+def _load_state(path):
+    try:
+        with open(path) as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return 0
+    if state.get('variants') != _signature():
+        return 0
+    return state.get('last_pk', 0)
+
+
+def _save_state(path, last_pk):
+    with open(path, 'w') as state_file:
+        json.dump({'variants': _signature(), 'last_pk': last_pk}, state_file)
+
+
+def _throttled(tasks, rate, pace):
+    """Отдаёт задачи не быстрее rate в секунду в среднем за весь проход.
+
+    Генератор читает поток пула, поэтому здесь только ожидание.
+    """
+    for task in tasks:
+        if rate:
+            delay = pace['count'] / rate - (time.monotonic() - pace['started'])
+            if delay > 0:
+                time.sleep(delay)
+            pace['count'] += 1
+        yield task
+
+
+def _post_chunks(last_pk, chunk_size):
+    from .models import Post
+
+    while True:
+        posts = list(
+            Post.objects
+            .filter(pk__gt=last_pk)
+            .exclude(image='')
+            .order_by('pk')
+            .only('pk', 'image', 'image_width', 'image_height')
+            [:chunk_size]
+        )
+        if not posts:
+            return
+        last_pk = posts[-1].pk
+        yield posts
+
+
+def _build_tasks(posts, totals, dry_run, limit=None):
+    """Задачи пула для порции постов и id постов по имени картинки.
+
+    totals считает все недостающие миниатюры, а задач ставится
+    не больше limit, если он задан.
+    """
+    tasks = []
+    post_ids = {}
+    for post in posts:
+        name = post.image.name
+        if name in post_ids:
+            # Посты с одинаковой картинкой делят один файл,
+            # из прошлых порций он уже есть в KV-хранилище.
+            post_ids[name].append(post.pk)
+            continue
+        post_ids[name] = [post.pk]
+        jobs = get_jobs(name, variants())
+        if not jobs:
+            continue
+        totals['images'] += 1
+        totals['thumbnails'] += len(jobs)
+        if limit is not None and len(tasks) >= limit:
+            continue
+        tasks.append((
+            settings.MEDIA_ROOT, name, jobs, stored_size(post.image),
+            dry_run,
+        ))
+    return tasks, post_ids
+
+
+def _save_results(results, totals, post_ids, dry_run):
+    """Учитывает результаты пула и регистрирует миниатюры. Карточки
+    постов с картинкой сбрасываются, как в _done: пока миниатюр не
+    было, в них мог попасть исходник."""
+    for name, result, error in results:
+        if error is not None:
+            logger.error(
+                'Не удалось создать миниатюры для %s: %s', name, error)
+            totals['errors'] += 1
+            continue
+        size, thumbnails = result
+        totals['bytes'] += sum(written for *_, written in thumbnails)
+        if not dry_run:
+            register(name, size, thumbnails)
+            cache_tags.bump([
+                cache_tags.make_tag(cache_tags.POST, post_id)
+                for post_id in post_ids[name]
+            ])
+
+
+def backfill(workers, chunk_size, rate=0, dry_run=False, sample=50,
+             state_path=None):
+    """Создаёт недостающие варианты всех картинок постов пулом процессов.
+
+    Посты обходятся порциями по pk; после каждой порции номер
+    последнего поста пишется в state_path, и повторный запуск
+    продолжает с него, пока не поменялись варианты. rate ограничивает
+    число картинок в секунду. При dry_run в памяти создаются варианты
+    первых sample картинок, и по ним оценивается общий объём.
+    Возвращает словарь с числом картинок, миниатюр, байтов и ошибок.
+    """
+    last_pk = 0 if dry_run or not state_path else _load_state(state_path)
+    totals = {'images': 0, 'thumbnails': 0, 'bytes': 0, 'errors': 0}
+    measured = 0
+    pace = {'started': time.monotonic(), 'count': 0}
+    pool = None
+    if workers:
+        pool = multiprocessing.get_context('spawn').Pool(
+            workers, initializer=_init_worker)
+    try:
+        for posts in _post_chunks(last_pk, chunk_size):
+            limit = max(sample - measured, 0) if dry_run else None
+            tasks, post_ids = _build_tasks(posts, totals, dry_run, limit)
+            measured += len(tasks)
+            tasks = _throttled(tasks, rate, pace)
+            results = (
+                pool.imap_unordered(render_task, tasks)
+                if pool else map(render_task, tasks)
+            )
+            _save_results(results, totals, post_ids, dry_run)
+            if state_path and not dry_run:
+                _save_state(state_path, posts[-1].pk)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if dry_run and measured:
+        totals['bytes'] = totals['bytes'] * totals['images'] // measured
+    return totals
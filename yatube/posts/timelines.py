@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Follow, Post, TimelineEntry
+
+
+def _trim(user_ids):
+    """Оставляет в лентах только TIMELINE_LENGTH последних записей.
+
+    Одним запросом на всех пользователей (user_ids — список или
+    подзапрос). Границей служит ключ ленты (pub_date, post_id),
+    поэтому посты с одинаковой датой не срезаются сверх лимита.
+    """
+    ranked = (
+        TimelineEntry.objects
+        .filter(user_id__in=user_ids)
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[F('pub_date').desc(), F('post_id').desc()],
+        ))
+        .order_by()
+        .values('id', 'position')
+    )
+    sql, params = ranked.query.sql_with_params()
+    table = connection.ops.quote_name(TimelineEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN ('
+            f'SELECT id FROM ({sql}) ranked WHERE position > %s)',
+            (*params, settings.TIMELINE_LENGTH),
+        )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост в ленты подписчиков автора.
+
+    Возвращает id подписчиков, чьи ленты изменились.
+    """
+    follower_ids = list(
+        Follow.objects
+        .filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    if not follower_ids:
+        return follower_ids
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=user_id, post=post, pub_date=post.pub_date
+                )
+                for user_id in follower_ids
+            ],
+            ignore_conflicts=True,
+        )
+        _trim(
+            Follow.objects
+            .filter(author_id=post.author_id)
+            .values('user_id')
+        )
+    return follower_ids
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    posts = (
+        Post.objects
+        .filter(author_id=author_id)
+        .values_list('id', 'pub_date')
+        [:settings.TIMELINE_LENGTH]
+    )
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=user_id, post_id=post_id, pub_date=pub_date
+                )
+                for post_id, pub_date in posts
+            ],
+            ignore_conflicts=True,
+        )
+        _trim([user_id])
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild(user_ids=None):
+    """Пересобирает ленты с нуля по Follow и Post.
+
+    Лента каждого пользователя собирается одним запросом по всем его
+    авторам, а не отдельным backfill на каждую подписку.
+    """
+    follows = Follow.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+    with transaction.atomic():
+        entries.delete()
+        for user_id in follows.order_by().values_list(
+                'user_id', flat=True).distinct():
+            posts = (
+                Post.objects
+                .filter(author_id__in=Follow.objects.filter(
+                    user_id=user_id).values('author_id'))
+                .values_list('id', 'pub_date')
+                [:settings.TIMELINE_LENGTH]
+            )
+            TimelineEntry.objects.bulk_create([
+                TimelineEntry(
+                    user_id=user_id, post_id=post_id, pub_date=pub_date
+                )
+                for post_id, pub_date in posts
+            ])
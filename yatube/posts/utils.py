@@ -0,0 +1,31 @@
+from .models import Comment
+from .paginators import BatchPaginator, CountingPaginator
+
+PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+
+
+def get_page_obj(request, queryset, scope=None, **kwargs):
+    """Возвращает страницу ленты по ?cursor= или ?page=.
+
+    Число постов берётся из счётчика scope или передаётся в count.
+    """
+    paginator = CountingPaginator(queryset, PER_PAGE, scope, **kwargs)
+    return paginator.get_page(
+        request.GET.get('page'), request.GET.get('cursor')
+    )
+
+
+def get_comments(post_id, cursor=None, fields=None):
+    """Порция комментариев поста с авторами и курсор следующей.
+
+    fields ограничивает поля комментариев, и авторы тогда не читаются.
+    """
+    queryset = Comment.objects.filter(post_id=post_id)
+    if fields:
+        queryset = queryset.only(*fields)
+    else:
+        queryset = queryset.select_related('author')
+    paginator = BatchPaginator(
+        queryset, COMMENTS_PER_PAGE, keys=('created', 'id'))
+    return paginator.get_batch(cursor)
@@ -1,77 +1,178 @@
 from django.core.paginator import Paginator
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 
-from .models import Group, Post, Follow
+from . import (
+    cache_tags, counters, freshness, page_cache, read_models, search, stats,
+    thumbnails,
+)
+from .uploads import streaming_image_uploads
+from .models import Follow, Group, Post, TimelineEntry
 from .forms import CommentForm, PostForm
+from .utils import PER_PAGE, get_comments, get_page_obj
 
 User = get_user_model()
 
 
-PER_PAGE = 10
+def _render_feed_page(request, page_obj, tags, author_link=True):
+    """Карточки страницы ленты и ссылка на следующую без base.html
+    и контекст-процессоров: для подгрузки при прокрутке."""
+    for post in page_obj:
+        tags.extend(cache_tags.post_tags(post))
+    page_cache.depend(request, tags)
+    return HttpResponse(render_to_string('posts/includes/feed_page.html', {
+        'page_obj': page_obj,
+        'author_link': author_link,
+        'fragment_url': request.path,
+    }))
 
 
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = read_models.feed(Post.objects.all())
+    page_obj = get_page_obj(request, post_list, (counters.ALL, None))
     return render(request, 'posts/index.html', {
         'page_obj': page_obj,
+        'fragment_url': reverse('posts:index_fragment'),
     }
     )
 
 
+def index_fragment(request):
+    post_list = read_models.feed(Post.objects.all())
+    page_obj = get_page_obj(request, post_list, (counters.ALL, None))
+    return _render_feed_page(
+        request, page_obj, [cache_tags.make_tag(cache_tags.FEED)])
+
+
+@freshness.conditional(freshness.group_posts)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = read_models.feed(group.posts.all())
+    page_obj = get_page_obj(request, post_list, (counters.GROUP, group.id))
     return render(request, 'posts/group_list.html', {
         'group': group,
         'page_obj': page_obj,
+        'fragment_url': reverse('posts:group_fragment', args=[slug]),
     }
     )
 
 
+def group_fragment(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    post_list = read_models.feed(group.posts.all())
+    page_obj = get_page_obj(request, post_list, (counters.GROUP, group.id))
+    return _render_feed_page(
+        request, page_obj, [cache_tags.make_tag(cache_tags.GROUP, group.id)])
+
+
+@freshness.conditional(freshness.profile)
 def profile(request, username):
-    author = User.objects.get(username=username)
-    post_list = Post.objects.filter(author=author)
-    posts_number = post_list.count()
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = (
-        request.user.is_authenticated
-        and author.following.filter(user=request.user).exists()
-    )
+    author = User.objects.select_related('stats').get(username=username)
+    author_stats = stats.for_user(author)
+    post_list = read_models.feed(Post.objects.filter(author=author))
+    page_obj = get_page_obj(
+        request, post_list, count=author_stats.posts_count)
     return render(request, 'posts/profile.html', {
         'author': author,
-        'posts_number': posts_number,
+        'author_stats': author_stats,
         'page_obj': page_obj,
-        'following': following,
+        'fragment_url': reverse('posts:profile_fragment', args=[username]),
     }
     )
 
 
+def profile_fragment(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats').only('pk', 'stats__posts_count'),
+        username=username,
+    )
+    post_list = read_models.feed(Post.objects.filter(author=author))
+    page_obj = get_page_obj(
+        request, post_list, count=stats.for_user(author).posts_count)
+    return _render_feed_page(
+        request, page_obj,
+        [cache_tags.make_tag(cache_tags.AUTHOR, author.id)],
+        author_link=False,
+    )
+
+
+@freshness.conditional(freshness.post_detail)
 def post_detail(request, post_id):
-    post = Post.objects.select_related('author', 'group').get(id=post_id)
-    post_list = Post.objects.filter(author=post.author)
-    posts_number = post_list.count()
+    post = (
+        Post.objects
+        .select_related('author__stats', 'group')
+        .get(id=post_id)
+    )
     form = CommentForm()
-    comments = post.comments.all()
+    comments, next_cursor = get_comments(
+        post_id, request.GET.get('comments'))
+    page_cache.depend(request, cache_tags.post_tags(post) + [
+        cache_tags.make_tag(cache_tags.AUTHOR, comment.author_id)
+        for comment in comments
+    ])
     return render(request, 'posts/post_detail.html', {
         'post': post,
-        'posts_number': posts_number,
+        'author_stats': stats.for_user(post.author),
         'post_id': post_id,
         'form': form,
         'comments': comments,
+        'next_cursor': next_cursor,
+    }
+    )
+
+
+def post_comments(request, post_id):
+    """Следующая порция комментариев для «Показать ещё»: HTML-фрагмент
+    или JSON при ?format=json."""
+    post = get_object_or_404(
+        Post.objects.only('pk', 'author_id', 'group_id'), pk=post_id)
+    comments, next_cursor = get_comments(post_id, request.GET.get('cursor'))
+    page_cache.depend(request, cache_tags.post_tags(post) + [
+        cache_tags.make_tag(cache_tags.AUTHOR, comment.author_id)
+        for comment in comments
+    ])
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+            'next_cursor': next_cursor,
+        }, json_dumps_params={'ensure_ascii': False})
+    return render(request, 'posts/includes/comments.html', {
+        'post_id': post_id,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    })
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    if search.is_available():
+        results = search.SearchResults(query)
+    elif query:
+        results = Post.objects.filter(text__icontains=query)
+    else:
+        results = Post.objects.none()
+    paginator = Paginator(results, PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': page_obj,
     }
     )
 
 
+@streaming_image_uploads
 @login_required
 def post_create(request):
     form = PostForm(
@@ -83,9 +184,11 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    thumbnails.schedule(post)
     return redirect('posts:profile', username=post.author)
 
 
+@streaming_image_uploads
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -104,6 +207,8 @@ def post_edit(request, post_id):
         )
     post = form.save(commit=False)
     post.save()
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post)
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -119,18 +224,34 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def _follow_page(request):
+    entries = read_models.timeline(
+        TimelineEntry.objects.filter(user=request.user))
+    page_obj = get_page_obj(
+        request, entries, (counters.FOLLOWER, request.user.id),
+        keys=('pub_date', 'post_id'),
+    )
+    page_obj.object_list = read_models.timeline_posts(page_obj)
+    return page_obj
+
+
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user).all()
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
     return render(request, 'posts/follow.html', {
-        'page_obj': page_obj,
+        'page_obj': _follow_page(request),
+        'fragment_url': reverse('posts:follow_fragment'),
     }
     )
 
 
+@login_required
+def follow_fragment(request):
+    return _render_feed_page(
+        request, _follow_page(request),
+        [cache_tags.make_tag(cache_tags.FOLLOWER, request.user.id)],
+    )
+
+
 @login_required
 def profile_follow(request, username):
     if request.user.username == username:
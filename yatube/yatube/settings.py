@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'posts.page_cache.PageCacheMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
@@ -157,3 +158,55 @@ CACHES = {
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Сколько последних постов хранится в ленте подписок пользователя
+TIMELINE_LENGTH = 1000
+
+# Счётчики постов для пагинации: сколько строк считать напрямую,
+# сколько секунд хранить точный счётчик (потом он считается заново)
+# и оценку для лент длиннее этого предела
+FEED_COUNT_LIMIT = 100000
+FEED_COUNT_TIMEOUT = 60 * 10
+FEED_COUNT_ESTIMATE_TIMEOUT = 60 * 60
+
+# Устаревшие фрагменты и страницы сбрасываются сменой поколения тегов
+# в posts.cache_tags. LocMemCache у каждого процесса свой, и смена
+# поколения в одном воркере не видна другим, поэтому с ним кеш живёт
+# столько же, сколько кеш страниц до тегов. Долгое хранение — только
+# с общим кешем (memcached, Redis).
+SHARED_CACHE = (
+    CACHES['default']['BACKEND']
+    != 'django.core.cache.backends.locmem.LocMemCache'
+)
+# Сколько секунд хранятся фрагменты лент
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 6 if SHARED_CACHE else 20
+# Сколько секунд хранятся общие страницы лент и постов
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6 if SHARED_CACHE else 20
+# Ленты строятся из облегчённых строк posts.read_models вместо моделей
+# Post; в контексте шаблонов тогда оказываются не экземпляры Post
+POST_FEED_READ_MODELS = False
+
+# JSON API лент: наибольший размер страницы и сколько секунд
+# клиенты и прокси могут не перепроверять публичные ответы
+API_MAX_LIMIT = 100
+API_CACHE_MAX_AGE = 60
+
+# Миниатюры картинок постов создаются заранее в пуле процессов
+# при сохранении поста; 0 процессов — создавать сразу в запросе
+THUMBNAIL_BACKEND = 'posts.thumbnails.PostThumbnailBackend'
+POST_THUMBNAIL_WORKERS = 2
+# Сколько найденных миниатюр помнить в памяти каждого процесса
+POST_THUMBNAIL_LRU_SIZE = 4096
+# Картинки постов хранятся в нескольких ширинах и форматах для srcset;
+# форматы, которые текущий Pillow не сохраняет, пропускаются
+POST_IMAGE_SIZE = (960, 339)
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+
+# Ограничения загружаемых картинок: размер файла проверяется на лету,
+# число пикселей — по заголовку до декодирования; JPEG больше
+# POST_IMAGE_MAX_SIDE уменьшаются при загрузке
+POST_IMAGE_MAX_BYTES = 30 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50 * 10 ** 6
+POST_IMAGE_MAX_SIDE = 4096
+POST_IMAGE_JPEG_QUALITY = 90